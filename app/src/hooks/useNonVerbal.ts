@@ -1,6 +1,7 @@
 import { useRef, useState, useCallback, useEffect } from "react";
 
 const FRAME_INTERVAL = 200; // Send frame every 200ms (5 FPS for efficiency)
+const frameDecoder = new TextDecoder();
 
 export interface NonVerbalScores {
     eye_contact: number | null;
@@ -48,22 +49,22 @@ export function useNonVerbal(sessionId: string) {
     }, []);
 
     // Capture a frame from the video element
-    const captureFrame = useCallback((): string | null => {
+    const captureFrame = useCallback((): Promise<Blob | null> => {
         const video = videoRef.current;
         const canvas = canvasRef.current;
 
         if (!video || !canvas || video.readyState < 2) {
-            return null;
+            return Promise.resolve(null);
         }
 
         const ctx = canvas.getContext('2d');
-        if (!ctx) return null;
+        if (!ctx) return Promise.resolve(null);
 
         // Draw video frame to canvas
         ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-        // Convert to base64 JPEG (more efficient than PNG)
-        return canvas.toDataURL('image/jpeg', 0.7);
+        // Encode as JPEG and send as a binary frame (no base64 overhead)
+        return new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.7));
     }, []);
 
     // Start analyzing
@@ -75,6 +76,8 @@ export function useNonVerbal(sessionId: string) {
 
         // Connect to WebSocket
         const ws = new WebSocket(`ws://localhost:8001/ws/video/${sessionId}`);
+        // Server sends JSON as binary frames
+        ws.binaryType = 'arraybuffer';
         wsRef.current = ws;
 
         ws.onopen = () => {
@@ -85,18 +88,21 @@ export function useNonVerbal(sessionId: string) {
             // Start sending frames at regular intervals
             intervalRef.current = window.setInterval(() => {
                 if (ws.readyState === WebSocket.OPEN) {
-                    const frameData = captureFrame();
-                    if (frameData) {
-                        ws.send(frameData);
-                        setFrameCount(prev => prev + 1);
-                    }
+                    captureFrame().then((frameData) => {
+                        if (frameData && ws.readyState === WebSocket.OPEN) {
+                            ws.send(frameData);
+                            setFrameCount(prev => prev + 1);
+                        }
+                    });
                 }
             }, FRAME_INTERVAL);
         };
 
         ws.onmessage = (event) => {
             try {
-                const result: NonVerbalResult = JSON.parse(event.data);
+                const result: NonVerbalResult = JSON.parse(
+                    typeof event.data === 'string' ? event.data : frameDecoder.decode(event.data)
+                );
 
                 if (result.session_status === "active") {
                     setScores(result.non_verbal_scores);
@@ -2,6 +2,7 @@ import { useRef, useState, useCallback, useEffect } from "react";
 
 const SAMPLE_RATE = 16000;
 const BUFFER_SIZE = 4096;
+const frameDecoder = new TextDecoder();
 
 interface AudioDevice {
     deviceId: string;
@@ -161,6 +162,8 @@ export function useVoice(sessionId: string, questionId: string) {
             const ws = new WebSocket(
                 `ws://localhost:8000/ws/voice/${sessionId}/${questionId}`
             );
+            // Server sends JSON as binary frames
+            ws.binaryType = "arraybuffer";
             wsRef.current = ws;
 
             ws.onopen = async () => {
@@ -220,7 +223,9 @@ export function useVoice(sessionId: string, questionId: string) {
             };
 
             ws.onmessage = (e) => {
-                const data = JSON.parse(e.data);
+                const data = JSON.parse(
+                    typeof e.data === "string" ? e.data : frameDecoder.decode(e.data)
+                );
                 if (data.partial !== undefined && data.partial) {
                     setLiveText(data.partial);
                 }
@@ -2,15 +2,18 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from vosk import Model, KaldiRecognizer
+from vosk import KaldiRecognizer
 from pydantic import BaseModel
 import numpy as np
-import json
+import orjson
 import asyncio
-import collections
-import librosa
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+from speech_utils import model, pitch_cv, realtime_conf_kernel, realtime_kernel
+
 # =====================
 # INIT
 # =====================
@@ -27,10 +30,18 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-model = Model("vosk-model-small-en-us-0.15")
+SAMPLE_RATE = 16000
 
-# Session storage for accumulating metrics
-sessions: Dict[str, Dict] = {}
+# Recognizers are built once and shared; this also caps concurrent streams
+REC_POOL_SIZE = 8
+rec_pool: "asyncio.Queue[KaldiRecognizer]" = asyncio.Queue(maxsize=REC_POOL_SIZE)
+for _ in range(REC_POOL_SIZE):
+    _rec = KaldiRecognizer(model, SAMPLE_RATE)
+    _rec.SetWords(True)
+    rec_pool.put_nowait(_rec)
+
+# Vosk decoding is blocking C++ that releases the GIL; run it off the event loop
+asr_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
 
 
 class AnswerSubmission(BaseModel):
@@ -39,6 +50,46 @@ class AnswerSubmission(BaseModel):
     raw_transcript: str
 
 
+@dataclass(slots=True)
+class Question:
+    """Live data for one answered question."""
+    transcript: List[str] = field(default_factory=list)  # final segments; join with " " when needed
+    word_count: int = 0
+    metrics: List[Dict] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Session:
+    """Accumulated speech metrics for one interview session."""
+    start_time: float
+    questions: Dict[str, Question] = field(default_factory=dict)
+    total_words: int = 0
+    total_silence_ratio: float = 0.0
+    total_pitch_var: float = 0.0
+    total_filler_est: int = 0
+    analysis_count: int = 0
+    transcripts: Dict[str, str] = field(default_factory=dict)
+
+    def add_final_text(self, question: Question, text: str) -> None:
+        """Append a final transcript segment and update the word counters."""
+        question.transcript.append(text)
+        n_words = len(text.split())
+        question.word_count += n_words
+        self.total_words += n_words
+
+
+# Session storage for accumulating metrics
+sessions: Dict[str, Session] = {}
+
+
+def get_or_create_session(session_id: str) -> Session:
+    """Return the session for session_id, creating it on first use."""
+    session = sessions.get(session_id)
+    if session is None:
+        session = sessions[session_id] = Session(start_time=asyncio.get_event_loop().time())
+    return session
+
+
 @app.get("/")
 def home():
     return FileResponse("static/index.html")
@@ -53,31 +104,83 @@ async def health():
 # =====================
 # REAL-TIME ANALYSIS
 # =====================
-def analyze_realtime(pcm_bytes, sr=16000):
-    """Analyze audio chunk for real-time metrics."""
-    y = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-    if len(y) < sr:
+RING_SECONDS = 5
+
+# The realtime window is fixed (5 s at 16 kHz), so the pitch search
+# parameters and per-connection buffer sizes are computed once here
+PITCH_FRAME = 1024
+PITCH_HOP = 512
+PITCH_LAG_MIN = SAMPLE_RATE // 300   # 300 Hz
+PITCH_LAG_MAX = SAMPLE_RATE // 80    # 80 Hz
+PITCH_FRAMES = (SAMPLE_RATE * RING_SECONDS - PITCH_FRAME) // PITCH_HOP + 1
+
+# Amplitude thresholds in int16 units, rounded so integer comparisons
+# match the original float comparisons on y = pcm / 32768
+SILENCE_THRESHOLD_I16 = int(np.ceil(0.02 * 32768))   # |y| < 0.02
+FILLER_LOW_I16 = int(0.05 * 32768)                   # |y| > 0.05
+FILLER_HIGH_I16 = int(np.ceil(0.15 * 32768))         # |y| < 0.15
+
+
+class PcmRing:
+    """
+    Circular int16 buffer holding the most recent `size` samples.
+
+    Writes and reads are at most two slice copies each; samples are never
+    touched one by one from Python.
+    """
+
+    __slots__ = ("buf", "pos", "filled")
+
+    def __init__(self, size: int):
+        self.buf = np.zeros(size, dtype=np.int16)
+        self.pos = 0     # next write index == oldest sample once full
+        self.filled = 0
+
+    def write(self, samples: np.ndarray) -> None:
+        """Append samples, overwriting the oldest ones."""
+        size = len(self.buf)
+        samples = samples[-size:]
+        n = len(samples)
+        first = min(n, size - self.pos)
+        np.copyto(self.buf[self.pos:self.pos + first], samples[:first])
+        np.copyto(self.buf[:n - first], samples[first:])
+        self.pos = (self.pos + n) % size
+        self.filled = min(self.filled + n, size)
+
+    def unroll(self, out: np.ndarray) -> np.ndarray:
+        """Copy the contents in chronological order into out; return the filled view."""
+        if self.filled < len(self.buf):
+            np.copyto(out[:self.filled], self.buf[:self.filled])
+            return out[:self.filled]
+        tail = len(self.buf) - self.pos
+        np.copyto(out[:tail], self.buf[self.pos:])
+        np.copyto(out[tail:], self.buf[:self.pos])
+        return out
+
+
+def analyze_realtime(samples, f0, sr=SAMPLE_RATE):
+    """
+    Analyze the rolling audio window for real-time metrics.
+
+    samples is the chronological int16 window; it is never converted to
+    float. f0 is a preallocated per-frame pitch buffer of PITCH_FRAMES entries.
+    """
+    n = len(samples)
+    if n < sr:
         return None
 
-    energy = float(np.mean(y**2))
-    silence_ratio = float(np.sum(np.abs(y) < 0.02) / len(y))
+    sum_sq, silent, filler = realtime_kernel(
+        samples, SILENCE_THRESHOLD_I16, FILLER_LOW_I16, FILLER_HIGH_I16
+    )
+    energy = sum_sq / n / (32768.0 ** 2)
+    silence_ratio = silent / n
 
-    try:
-        pitch = librosa.yin(y, fmin=80, fmax=300, sr=sr)
-        pitch = pitch[~np.isnan(pitch)]
-        pitch_var = float(np.std(pitch) / np.mean(pitch)) if len(pitch) > 10 else 0
-    except:
-        pitch_var = 0
+    pitch_var = float(pitch_cv(samples, f0, sr, PITCH_FRAME, PITCH_HOP, PITCH_LAG_MIN, PITCH_LAG_MAX))
 
     # Estimate filler words (crude heuristic based on energy patterns)
-    filler_est = int(np.sum((np.abs(y) > 0.05) & (np.abs(y) < 0.15)) / sr)
+    filler_est = int(filler / sr)
 
-    confidence = max(0, min(
-        1,
-        0.4*(1 - silence_ratio) +
-        0.3*min(energy * 100, 1) +
-        0.3*(1 - min(pitch_var, 1))
-    ))
+    confidence = realtime_conf_kernel(silence_ratio, energy, pitch_var)
 
     return {
         "energy": round(energy, 4),
@@ -91,83 +194,95 @@ def analyze_realtime(pcm_bytes, sr=16000):
 # =====================
 # LIVE WEBSOCKET
 # =====================
+# Caption frames have a fixed shape, so they are assembled from
+# prebuilt bytes around the orjson-encoded string
+PARTIAL_PREFIX = b'{"partial":'
+FINAL_PREFIX = b'{"final":'
+FRAME_SUFFIX = b'}'
+
+
 @app.websocket("/ws/voice/{session_id}/{question_id}")
 async def voice_ws(ws: WebSocket, session_id: str, question_id: str):
     """WebSocket endpoint for real-time speech processing."""
     await ws.accept()
     print(f"[Speech] Client connected: session={session_id}, question={question_id}")
 
-    rec = KaldiRecognizer(model, 16000)
-    rec.SetWords(True)
-
-    pcm_buffer = collections.deque(maxlen=16000 * 5)  # 5 seconds rolling buffer
-    last_analysis = asyncio.get_event_loop().time()
-    
-    # Initialize session if not exists
-    if session_id not in sessions:
-        sessions[session_id] = {
-            "questions": {},
-            "start_time": asyncio.get_event_loop().time(),
-            "total_words": 0,
-            "total_silence_ratio": 0,
-            "total_pitch_var": 0,
-            "total_filler_est": 0,
-            "analysis_count": 0,
-            "transcripts": {}
-        }
+    try:
+        rec = rec_pool.get_nowait()
+    except asyncio.QueueEmpty:
+        print(f"[Speech] No free recognizer, rejecting session={session_id}")
+        await ws.close(code=1013)  # Try Again Later
+        return
+
+    # 5 seconds rolling buffer, preallocated once per connection
+    ring = PcmRing(SAMPLE_RATE * RING_SECONDS)
+    scratch = np.empty(SAMPLE_RATE * RING_SECONDS, dtype=np.int16)
+    f0_buf = np.empty(PITCH_FRAMES, dtype=np.float32)
+    loop = asyncio.get_event_loop()
+    last_analysis = loop.time()
+    last_partial_raw = ""
+    analysis_future: Optional[asyncio.Future] = None
     
-    # Initialize question data
-    sessions[session_id]["questions"][question_id] = {
-        "transcript": "",
-        "word_count": 0,
-        "metrics": []
-    }
+    session = get_or_create_session(session_id)
+    question = session.questions[question_id] = Question()
 
     try:
         while True:
             pcm = await ws.receive_bytes()
-            pcm_buffer.extend(pcm)
+            ring.write(np.frombuffer(pcm, dtype=np.int16))
 
             # Live captions via Vosk
-            if rec.AcceptWaveform(pcm):
-                res = json.loads(rec.Result())
+            if await loop.run_in_executor(asr_executor, rec.AcceptWaveform, pcm):
+                res = orjson.loads(await loop.run_in_executor(asr_executor, rec.Result))
+                last_partial_raw = ""
                 if res.get("text"):
                     text = res["text"]
-                    await ws.send_json({"final": text})
-                    # Accumulate transcript
-                    sessions[session_id]["questions"][question_id]["transcript"] += " " + text
-                    sessions[session_id]["questions"][question_id]["word_count"] += len(text.split())
-                    sessions[session_id]["total_words"] += len(text.split())
+                    await ws.send_bytes(FINAL_PREFIX + orjson.dumps(text) + FRAME_SUFFIX)
+                    session.add_final_text(question, text)
             else:
-                part = json.loads(rec.PartialResult())
-                if part.get("partial"):
-                    await ws.send_json({"partial": part["partial"]})
-
-            # Analysis every 2 seconds
-            now = asyncio.get_event_loop().time()
-            if now - last_analysis > 2:
-                last_analysis = now
-                metrics = analyze_realtime(bytes(pcm_buffer))
+                # Partials repeat verbatim across many chunks; only decode on change
+                partial_raw = rec.PartialResult()
+                if partial_raw != last_partial_raw:
+                    last_partial_raw = partial_raw
+                    part = orjson.loads(partial_raw)
+                    if part.get("partial"):
+                        await ws.send_bytes(PARTIAL_PREFIX + orjson.dumps(part["partial"]) + FRAME_SUFFIX)
+
+            # Publish the previous analysis once its worker has finished
+            if analysis_future is not None and analysis_future.done():
+                metrics = analysis_future.result()
+                analysis_future = None
                 if metrics:
-                    await ws.send_json({"metrics": metrics})
+                    await ws.send_bytes(orjson.dumps({"metrics": metrics}, option=orjson.OPT_SERIALIZE_NUMPY))
                     # Accumulate metrics for session analysis
-                    sessions[session_id]["questions"][question_id]["metrics"].append(metrics)
-                    sessions[session_id]["total_silence_ratio"] += metrics["silence_ratio"]
-                    sessions[session_id]["total_pitch_var"] += metrics["pitch_variation"]
-                    sessions[session_id]["total_filler_est"] += metrics["filler_estimate"]
-                    sessions[session_id]["analysis_count"] += 1
+                    question.metrics.append(metrics)
+                    session.total_silence_ratio += metrics["silence_ratio"]
+                    session.total_pitch_var += metrics["pitch_variation"]
+                    session.total_filler_est += metrics["filler_estimate"]
+                    session.analysis_count += 1
+
+            # Analysis every 2 seconds, off the event loop so caption ingest
+            # never waits on it; a tick is dropped while one is still running
+            now = loop.time()
+            if now - last_analysis > 2 and analysis_future is None:
+                last_analysis = now
+                window = ring.unroll(scratch)
+                analysis_future = loop.run_in_executor(asr_executor, analyze_realtime, window, f0_buf)
 
     except WebSocketDisconnect:
         print(f"[Speech] Client disconnected: session={session_id}")
     except Exception as e:
         print(f"[Speech] WebSocket error: {e}")
     finally:
-        # Get final result from Vosk
-        final = json.loads(rec.FinalResult())
-        if final.get("text"):
-            sessions[session_id]["questions"][question_id]["transcript"] += " " + final["text"]
-            sessions[session_id]["questions"][question_id]["word_count"] += len(final["text"].split())
-            sessions[session_id]["total_words"] += len(final["text"].split())
+        try:
+            # Get final result from Vosk
+            final = orjson.loads(rec.FinalResult())
+            if final.get("text"):
+                session.add_final_text(question, final["text"])
+        finally:
+            # Return the recognizer to the pool clean for the next stream
+            rec.Reset()
+            rec_pool.put_nowait(rec)
         print(f"[Speech] Session {session_id}, Question {question_id} ended")
 
 
@@ -177,19 +292,7 @@ async def submit_answer(submission: AnswerSubmission):
     session_id = submission.session_id
     question_id = submission.question_id
     
-    if session_id not in sessions:
-        sessions[session_id] = {
-            "questions": {},
-            "start_time": asyncio.get_event_loop().time(),
-            "total_words": 0,
-            "total_silence_ratio": 0,
-            "total_pitch_var": 0,
-            "total_filler_est": 0,
-            "analysis_count": 0,
-            "transcripts": {}
-        }
-    
-    sessions[session_id]["transcripts"][question_id] = submission.raw_transcript
+    get_or_create_session(session_id).transcripts[question_id] = submission.raw_transcript
     
     return {"status": "ok", "session_id": session_id, "question_id": question_id}
 
@@ -212,18 +315,17 @@ async def analyze_session(session_id: str):
         }
     
     session = sessions[session_id]
-    analysis_count = max(session.get("analysis_count", 1), 1)
-    total_words = session.get("total_words", 0)
+    analysis_count = max(session.analysis_count, 1)
+    total_words = session.total_words
     
     # Calculate duration
-    start_time = session.get("start_time", asyncio.get_event_loop().time())
-    duration = asyncio.get_event_loop().time() - start_time
+    duration = asyncio.get_event_loop().time() - session.start_time
     duration = max(duration, 1)  # Avoid division by zero
     
     # Calculate average metrics
-    avg_silence_ratio = session.get("total_silence_ratio", 0) / analysis_count
-    avg_pitch_var = session.get("total_pitch_var", 0) / analysis_count
-    avg_filler_est = session.get("total_filler_est", 0) / analysis_count
+    avg_silence_ratio = session.total_silence_ratio / analysis_count
+    avg_pitch_var = session.total_pitch_var / analysis_count
+    avg_filler_est = session.total_filler_est / analysis_count
     
     # Calculate WPM (words per minute)
     avg_wpm = (total_words / duration) * 60 if duration > 0 else 0
@@ -255,7 +357,7 @@ async def analyze_session(session_id: str):
             "duration": round(duration, 1)
         },
         "total_words": total_words,
-        "questions_answered": len(session.get("questions", {}))
+        "questions_answered": len(session.questions)
     }
 
 
@@ -3,28 +3,27 @@ import json
 import librosa
 import numpy as np
 import parselmouth
+from numba import njit
 from vosk import Model, KaldiRecognizer
-import wave
 
 model = Model("vosk-model-small-en-us-0.15")
 
-def convert_to_wav(input_path):
-    output_path = input_path.replace(".webm", ".wav")
-    command = ["ffmpeg", "-y", "-i", input_path, "-ar", "16000", "-ac", "1", output_path]
-    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    return output_path
+def webm_bytes_to_pcm(data, sr=16000):
+    # Decode in memory: webm on ffmpeg's stdin, mono s16le PCM on its stdout
+    command = ["ffmpeg", "-f", "webm", "-i", "pipe:0",
+               "-f", "s16le", "-ar", str(sr), "-ac", "1", "pipe:1"]
+    proc = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return np.frombuffer(proc.stdout, dtype=np.int16)
 
-def transcribe_vosk(wav_path):
-    wf = wave.open(wav_path, "rb")
-    rec = KaldiRecognizer(model, wf.getframerate())
+def transcribe_vosk(pcm, sr=16000):
+    rec = KaldiRecognizer(model, sr)
     rec.SetWords(True)
 
+    data = pcm.tobytes()
+    step = 4000 * pcm.itemsize
     results=[]
-    while True:
-        data = wf.readframes(4000)
-        if len(data)==0:
-            break
-        if rec.AcceptWaveform(data):
+    for start in range(0, len(data), step):
+        if rec.AcceptWaveform(data[start:start+step]):
             results.append(json.loads(rec.Result()))
     results.append(json.loads(rec.FinalResult()))
 
@@ -40,17 +39,125 @@ def analyze_energy(y):
     return float(np.mean(rms))
 
 def analyze_pauses(y, sr):
-    intervals = librosa.effects.split(y, top_db=25)
-    silence = len(y)/sr
-    speech = sum((end-start)/sr for start,end in intervals)
-    return max(silence - speech, 0)
+    total = len(y)/sr
+    speech = speech_time(np.ascontiguousarray(y, dtype=np.float32), sr)
+    return max(total - speech, 0)
 
-def analyze_pitch(wav_path):
-    snd = parselmouth.Sound(wav_path)
+def analyze_pitch(y, sr):
+    # y: float samples in [-1, 1]; wrapped in memory instead of re-reading a wav
+    snd = parselmouth.Sound(values=y.astype(np.float64, copy=False), sampling_frequency=sr)
     pitch = snd.to_pitch()
     values = pitch.selected_array['frequency']
-    values = values[values>0]
-    return float(np.mean(values)), float(np.std(values)/np.mean(values))
+    _, mean, cv = mean_cv(values)
+    return float(mean), float(cv)
+
+@njit(cache=True, fastmath=True)
+def conf_kernel(wpm, pause_ratio, pitch_var, energy):
+    return max(min(0.4*(wpm/160)+0.3*energy-0.2*pause_ratio-0.1*pitch_var,1.0),0.0)
 
 def confidence_score(wpm, pause_ratio, pitch_var, energy):
-    return round(max(min(0.4*(wpm/160)+0.3*energy-0.2*pause_ratio-0.1*pitch_var,1),0),2)
+    return round(conf_kernel(wpm, pause_ratio, pitch_var, energy),2)
+
+@njit(cache=True, fastmath=True)
+def realtime_conf_kernel(silence_ratio, energy, pitch_var):
+    return max(0.0, min(1.0,
+        0.4*(1 - silence_ratio) +
+        0.3*min(energy * 100, 1.0) +
+        0.3*(1 - min(pitch_var, 1.0))
+    ))
+
+@njit(cache=True, fastmath=True)
+def realtime_kernel(y_i16, sil_thr, lo, hi):
+    # One pass over int16 samples: (sum of squares, silent count, filler-band count)
+    ssq = 0.0
+    sil = 0
+    fill = 0
+    for i in range(y_i16.shape[0]):
+        v = np.int32(y_i16[i])  # widen so abs(-32768) does not wrap
+        a = abs(v)
+        ssq += float(v) * v
+        sil += a < sil_thr
+        fill += (a > lo) & (a < hi)
+    return ssq, sil, fill
+
+@njit(cache=True)
+def mean_cv(a):
+    # One-pass (Welford) count, mean and std/mean over the positive
+    # entries of a; zeros mark unvoiced frames and are skipped
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(a.shape[0]):
+        v = a[i]
+        if v > 0:
+            n += 1
+            d = v - mean
+            mean += d / n
+            m2 += d * (v - mean)
+    if n == 0:
+        return 0, 0.0, 0.0
+    return n, mean, np.sqrt(m2 / n) / mean
+
+@njit(cache=True)
+def pitch_cv(y, f0, sr=16000, frame=1024, hop=512, lag_min=53, lag_max=200, voicing=0.3):
+    # Coefficient of variation of f0 from a per-frame autocorrelation peak.
+    # Lags 53..200 cover 80-300 Hz at 16 kHz; weakly periodic frames stay 0.
+    # f0 is a caller-owned scratch buffer with room for every frame of y.
+    # y may be raw int16 PCM: samples are widened per element and the
+    # voicing test is scale-free, so no normalized copy is needed.
+    n_frames = (len(y) - frame) // hop + 1 if len(y) >= frame else 0
+    n_frames = min(n_frames, len(f0))
+    for t in range(n_frames):
+        f0[t] = 0.0
+        start = t * hop
+        energy = 0.0
+        for i in range(frame):
+            a = float(y[start + i])
+            energy += a * a
+        if energy == 0.0:
+            continue
+        best = 0.0
+        best_lag = 0
+        for lag in range(lag_min, lag_max + 1):
+            acc = 0.0
+            for i in range(frame - lag):
+                acc += float(y[start + i]) * float(y[start + i + lag])
+            if acc > best:
+                best = acc
+                best_lag = lag
+        if best_lag > 0 and best > voicing * energy:
+            f0[t] = sr / best_lag
+
+    count, _, cv = mean_cv(f0[:n_frames])
+    return cv if count > 10 else 0.0
+
+@njit(cache=True, fastmath=True)
+def speech_time(y, sr, frame=2048, hop=512, top_db=25.0):
+    # Seconds of non-silent audio, using the same rule as librosa.effects.split:
+    # centered frames (zero-padded by frame//2 on each side), a frame is speech
+    # if its power is within top_db of the loudest frame (power_to_db's
+    # amin=1e-10 floor included), and each speech frame spans hop samples with
+    # the last span clamped to len(y). Compared in mean-square space so no
+    # sqrt/log10 is needed per frame.
+    n = len(y)
+    if n == 0:
+        return 0.0
+    n_frames = 1 + n // hop
+    pad = frame // 2
+    ms = np.empty(n_frames, dtype=np.float64)
+    ms_max = 0.0
+    for t in range(n_frames):
+        lo = max(t * hop - pad, 0)
+        hi = min(t * hop - pad + frame, n)
+        acc = 0.0
+        for i in range(lo, hi):
+            acc += y[i] * y[i]
+        ms[t] = max(acc / frame, 1e-10)
+        if ms[t] > ms_max:
+            ms_max = ms[t]
+    thr = ms_max * 10.0 ** (-top_db / 10.0)
+    samples = 0
+    for t in range(n_frames):
+        if ms[t] > thr:
+            samples += min((t + 1) * hop, n) - t * hop
+    return samples / sr
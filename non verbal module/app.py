@@ -4,17 +4,40 @@ Processes video frames via WebSocket and returns real-time analysis scores.
 """
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import base64
+from fastapi.responses import ORJSONResponse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import cv2
 import numpy as np
 import sys
 import os
+import threading
 
 # Add the src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from non_verbal_analysis.analyzer import NonVerbalAnalyzer
 
+# SIMD base64 for legacy text frames; stdlib fallback has the same API
+try:
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+# Optional GPU JPEG decoder (nvJPEG); falls back to OpenCV when unavailable.
+# Probed once here; decoders are not shared across threads, so each executor
+# thread creates its own on first use (see _get_thread_gpu_decoder).
+try:
+    from nvidia import nvimgcodec
+    nvimgcodec.Decoder()
+    gpu_decode_available = True
+except Exception:
+    gpu_decode_available = False
+
+_thread_gpu = threading.local()
+
 app = FastAPI(title="Non-Verbal Analysis API")
 
 # CORS configuration for Vite frontend
@@ -26,32 +49,221 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the analyzer
+# Initialize the analyzer. It is shared by the worker threads; each worker
+# gets its own MediaPipe models on first use.
 analyzer = NonVerbalAnalyzer()
+analysis_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Store session data for final analysis. Entries outlive the WebSocket so
+# analyze_session can run after disconnect; the least recently used ones
+# are evicted once MAX_SESSIONS is exceeded.
+MAX_SESSIONS = 1024
+sessions = OrderedDict()
+
+
+def store_session(session_id: str, data: dict) -> dict:
+    """Insert or replace a session entry, evicting the least recently used beyond MAX_SESSIONS."""
+    sessions[session_id] = data
+    sessions.move_to_end(session_id)
+    while len(sessions) > MAX_SESSIONS:
+        evicted_id, _ = sessions.popitem(last=False)
+        analyzer.delete_session(evicted_id)
+    return data
 
-# Store session data for final analysis
-sessions = {}
+# Initial per-session score capacity (frames); doubled on overflow
+SCORES_INITIAL_CAPACITY = 3600
 
+# Frame sent back when a message cannot be decoded
+DECODE_ERROR_FRAME = orjson.dumps({
+    "status": "error",
+    "message": "Failed to decode frame"
+})
+
+# Frames at least this wide are decoded at half resolution (libjpeg 1/2 IDCT).
+# MediaPipe landmark accuracy saturates well below that, so smaller frames
+# (e.g. the 320x240 web client) are decoded as-is.
+REDUCED_DECODE_MIN_WIDTH = 800
+
+# JPEG start-of-frame markers (baseline, extended, progressive, lossless, ...)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _jpeg_size(buf):
+    """Read (width, height) from a JPEG's SOF header without decoding it."""
+    if buf[:2] != b'\xff\xd8':
+        return None
+    i, n = 2, len(buf)
+    while i + 9 < n:
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height = (buf[i + 5] << 8) | buf[i + 6]
+            width = (buf[i + 7] << 8) | buf[i + 8]
+            return width, height
+        i += 2 + ((buf[i + 2] << 8) | buf[i + 3])
+    return None
 
-def decode_frame(base64_data: str) -> np.ndarray:
-    """Decode base64 image data to numpy array."""
+
+def decode_frame(data) -> tuple:
+    """
+    Decode an encoded image to a numpy array.
+    
+    Accepts raw JPEG bytes (binary WebSocket frames) or, for older
+    clients, a base64 string / data URL (text frames).
+    
+    Returns (frame, is_rgb): the GPU decoder yields RGB, which the analyzer
+    can use without a color conversion; OpenCV yields BGR. frame is None
+    if decoding failed.
+    """
     try:
-        # Remove data URL prefix if present
-        if ',' in base64_data:
-            base64_data = base64_data.split(',')[1]
+        if isinstance(data, str):
+            # Remove data URL prefix if present
+            img_bytes = _b64.b64decode(data.rpartition(',')[2], validate=False)
+        else:
+            img_bytes = data
         
-        # Decode base64
-        img_bytes = base64.b64decode(base64_data)
+        if gpu_decode_available:
+            frame = _gpu_decode(img_bytes)
+            if frame is not None:
+                return frame, True
         
         # Convert to numpy array
         nparr = np.frombuffer(img_bytes, np.uint8)
         
-        # Decode image
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Decode image, letting libjpeg downscale large frames during the IDCT
+        size = _jpeg_size(img_bytes)
+        if size is not None and size[0] >= REDUCED_DECODE_MIN_WIDTH:
+            flags = cv2.IMREAD_REDUCED_COLOR_2
+        else:
+            flags = cv2.IMREAD_COLOR
+        frame = cv2.imdecode(nparr, flags)
         
-        return frame
+        return frame, False
     except Exception as e:
         print(f"[NonVerbal] Error decoding frame: {e}")
+        return None, False
+
+
+def decode_and_process(session_id: str, data) -> dict:
+    """
+    Decode one frame and run it through the analyzer.
+    
+    Runs as a single executor task so the decoded frame stays on one worker
+    thread. Returns None if the frame could not be decoded.
+    """
+    frame, is_rgb = decode_frame(data)
+    if frame is None:
+        return None
+    return analyzer.process_frame(session_id, frame, is_rgb)
+
+
+class SessionScores:
+    """
+    Per-frame scores of one session, stored column-wise.
+    
+    One preallocated float32 array per score and a shared count, so appending
+    a frame allocates nothing and each average is a contiguous pass.
+    """
+    __slots__ = ("ec", "fe", "po", "st", "fin", "n", "cap")
+    
+    def __init__(self, cap: int = SCORES_INITIAL_CAPACITY):
+        self.cap = cap
+        self.n = 0
+        self.ec = np.empty(cap, dtype=np.float32)
+        self.fe = np.empty(cap, dtype=np.float32)
+        self.po = np.empty(cap, dtype=np.float32)
+        self.st = np.empty(cap, dtype=np.float32)
+        self.fin = np.empty(cap, dtype=np.float32)
+    
+    def append(self, scores: dict):
+        """Record one frame's scores. Missing sub-scores count as 0."""
+        n = self.n
+        if n == self.cap:
+            self._grow()
+        self.ec[n] = scores.get("eye_contact") or 0
+        self.fe[n] = scores.get("facial_expression") or 0
+        self.po[n] = scores.get("posture") or 0
+        self.st[n] = scores.get("stability") or 0
+        self.fin[n] = scores.get("final_non_verbal_score") or 0
+        self.n = n + 1
+    
+    def _grow(self):
+        self.cap *= 2
+        self.ec = np.resize(self.ec, self.cap)
+        self.fe = np.resize(self.fe, self.cap)
+        self.po = np.resize(self.po, self.cap)
+        self.st = np.resize(self.st, self.cap)
+        self.fin = np.resize(self.fin, self.cap)
+    
+    def means(self) -> list:
+        """Average of each score over the recorded frames, in field order."""
+        n = self.n
+        return [float(a[:n].mean(dtype=np.float64)) for a in (self.ec, self.fe, self.po, self.st, self.fin)]
+
+
+class LatestFrameReader:
+    """
+    Receives WebSocket messages in a background task and keeps only the newest.
+    
+    If analysis falls behind the client, frames that arrived in the meantime
+    are dropped instead of queueing, so latency stays bounded.
+    """
+    
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.dropped = 0
+        self._message = None
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._pump())
+    
+    async def _pump(self):
+        try:
+            while True:
+                message = await self.ws.receive()
+                if self._message is not None:
+                    self.dropped += 1
+                self._message = message
+                self._ready.set()
+                if message["type"] == "websocket.disconnect":
+                    return
+        except Exception as e:
+            print(f"[NonVerbal] Error receiving frame: {e}")
+            self._message = {"type": "websocket.disconnect", "code": 1006}
+            self._ready.set()
+    
+    async def receive(self) -> dict:
+        """Wait for and return the newest unprocessed message."""
+        await self._ready.wait()
+        self._ready.clear()
+        message, self._message = self._message, None
+        return message
+    
+    def close(self):
+        self._task.cancel()
+
+
+def _get_thread_gpu_decoder():
+    """Return the calling thread's nvimgcodec decoder, created on first use."""
+    decoder = getattr(_thread_gpu, "decoder", None)
+    if decoder is None:
+        decoder = _thread_gpu.decoder = nvimgcodec.Decoder()
+    return decoder
+
+
+def _gpu_decode(img_bytes) -> np.ndarray:
+    """Decode to RGB on the GPU with nvJPEG. Returns None if the decoder rejects the data."""
+    try:
+        image = _get_thread_gpu_decoder().decode(img_bytes)
+        if image is None:
+            return None
+        return np.asarray(image.cpu())
+    except Exception as e:
+        print(f"[NonVerbal] GPU decode failed, using CPU: {e}")
         return None
 
 
@@ -62,64 +274,69 @@ async def video_ws(ws: WebSocket, session_id: str):
     print(f"[NonVerbal] Client connected: session={session_id}")
     
     # Initialize session storage
-    sessions[session_id] = {
+    sess = store_session(session_id, {
         "frame_count": 0,
-        "scores_history": [],
+        "scores": SessionScores(),
         "last_valid_scores": None
-    }
+    })
+    
+    reader = LatestFrameReader(ws)
+    loop = asyncio.get_event_loop()
     
     try:
         while True:
-            # Receive base64-encoded frame
-            data = await ws.receive_text()
+            # Receive the newest frame: raw JPEG bytes, or base64 text from older clients
+            message = await reader.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = message.get("bytes")
+            if data is None:
+                data = message.get("text")
             
-            # Decode frame
-            frame = decode_frame(data)
+            # Decode and analyze the frame off the event loop
+            result = await loop.run_in_executor(analysis_executor, decode_and_process, session_id, data)
             
-            if frame is None:
-                await ws.send_json({
-                    "status": "error",
-                    "message": "Failed to decode frame"
-                })
+            if result is None:
+                await ws.send_bytes(DECODE_ERROR_FRAME)
                 continue
             
-            sessions[session_id]["frame_count"] += 1
-            
-            # Process frame through analyzer
-            result = analyzer.process_frame(session_id, frame)
+            sess["frame_count"] += 1
             
             # Store valid scores
             if isinstance(result, dict) and result.get("session_status") == "active":
                 scores = result.get("non_verbal_scores", {})
                 if scores.get("final_non_verbal_score") is not None:
-                    sessions[session_id]["scores_history"].append(scores)
-                    sessions[session_id]["last_valid_scores"] = scores
+                    sess["scores"].append(scores)
+                    sess["last_valid_scores"] = scores
             
-            # Send result back to client
-            await ws.send_json(result)
+            # Send result back to client as pre-serialized JSON bytes
+            await ws.send_bytes(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY))
             
             # Log periodically
-            if sessions[session_id]["frame_count"] % 30 == 0:
-                print(f"[NonVerbal] Session {session_id}: {sessions[session_id]['frame_count']} frames processed")
+            if sess["frame_count"] % 30 == 0:
+                print(f"[NonVerbal] Session {session_id}: {sess['frame_count']} frames processed, {reader.dropped} dropped")
     
     except WebSocketDisconnect:
         print(f"[NonVerbal] Client disconnected: session={session_id}")
     except Exception as e:
         print(f"[NonVerbal] Error in WebSocket: {e}")
     finally:
+        reader.close()
         print(f"[NonVerbal] Session {session_id} ended with {sessions.get(session_id, {}).get('frame_count', 0)} frames")
 
 
-@app.post("/analyze_session/{session_id}")
+@app.post("/analyze_session/{session_id}", response_class=ORJSONResponse)
 async def analyze_session(session_id: str):
     """Get final analysis summary for a session."""
     if session_id not in sessions:
         return {"error": "Session not found"}
     
     session_data = sessions[session_id]
-    scores_history = session_data.get("scores_history", [])
+    sessions.move_to_end(session_id)
+    session_scores = session_data["scores"]
+    count = session_scores.n
     
-    if not scores_history:
+    if not count:
         return {
             "session_id": session_id,
             "total_frames": session_data.get("frame_count", 0),
@@ -134,11 +351,7 @@ async def analyze_session(session_id: str):
         }
     
     # Calculate average scores
-    avg_eye_contact = np.mean([s.get("eye_contact", 0) or 0 for s in scores_history])
-    avg_expression = np.mean([s.get("facial_expression", 0) or 0 for s in scores_history])
-    avg_posture = np.mean([s.get("posture", 0) or 0 for s in scores_history])
-    avg_stability = np.mean([s.get("stability", 0) or 0 for s in scores_history])
-    avg_final = np.mean([s.get("final_non_verbal_score", 0) or 0 for s in scores_history])
+    avg_eye_contact, avg_expression, avg_posture, avg_stability, avg_final = session_scores.means()
     
     # Determine pass/fail (threshold: 60)
     pass_status = "pass" if avg_final >= 60 else "fail"
@@ -146,7 +359,7 @@ async def analyze_session(session_id: str):
     return {
         "session_id": session_id,
         "total_frames": session_data.get("frame_count", 0),
-        "analyzed_frames": len(scores_history),
+        "analyzed_frames": count,
         "non_verbal_scores": {
             "eye_contact": round(avg_eye_contact, 2),
             "facial_expression": round(avg_expression, 2),
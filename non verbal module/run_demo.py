@@ -10,6 +10,8 @@ def run_realtime_test():
     
     # Open webcam
     cap = cv2.VideoCapture(0)
+    # Keep only the newest frame so analysis never runs on stale frames
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     
     if not cap.isOpened():
         print("Error: Could not open webcam.")
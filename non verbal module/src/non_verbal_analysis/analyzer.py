@@ -2,17 +2,16 @@
 Non-verbal analysis orchestrator.
 Coordinates the strict processing pipeline for frame-by-frame analysis.
 """
+import threading
 import cv2
 import mediapipe as mp
 import numpy as np
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 
 from .models import (
-    AnalysisOutput,
     InsufficientDataOutput,
     CancelledSessionOutput,
-    SkippedFrameOutput,
-    NonVerbalScores
+    SkippedFrameOutput
 )
 from .session_manager import SessionManager, SessionState
 from .pipeline import (
@@ -30,51 +29,103 @@ from .pipeline import (
     update_session_state
 )
 from .eye_contact_analyzer import analyze_eye_contact, get_eye_contact_score
+from .utils import ENGAGEMENT_SCORE_SCALE
 from .integrity_enforcer import IntegrityEnforcer
 
 
+# Per-frame insight rules: (threshold, message), applied in order to
+# (eye contact, posture, stability, facial expression) scores below threshold
+INSIGHT_RULES = (
+    (60, "Eye contact was inconsistent"),
+    (60, "Posture needs improvement"),
+    (60, "Frequent movement detected; try to remain still"),
+    (30, "Facial engagement appears low"),
+)
+
+# MediaPipe graphs are not thread-safe, so each thread that processes frames
+# owns one FaceMesh and one Pose, created on first use and shared by all
+# analyzers running on that thread.
+_thread_models = threading.local()
+
+
+def _get_thread_models():
+    """
+    Return this thread's (face_mesh, pose) MediaPipe models.
+    
+    Returns:
+        Tuple of (FaceMesh, Pose) instances owned by the calling thread
+    """
+    models = getattr(_thread_models, "models", None)
+    if models is None:
+        # MediaPipe Face Mesh for facial landmarks
+        face_mesh = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=2,  # To detect multiple faces for integrity enforcement
+            refine_landmarks=True,  # Iris landmarks (468/473) are required for gaze
+            min_detection_confidence=0.4,
+            min_tracking_confidence=0.4
+        )
+        
+        # MediaPipe Pose for posture analysis
+        pose = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        
+        models = (face_mesh, pose)
+        _thread_models.models = models
+    return models
+
+
 class NonVerbalAnalyzer:
     """
     Non-verbal analysis orchestrator.
     
     Responsibilities:
-    1. Initialize MediaPipe models
+    1. Obtain the calling thread's MediaPipe models
     2. Orchestrate pipeline execution
     3. Handle errors and edge cases
     4. Generate structured outputs
     
     This class does NOT contain feature extraction logic.
     All analysis is delegated to pipeline stages.
+    
+    One instance may be shared by worker threads: MediaPipe models are
+    per-thread, but frames of the same session must not be processed
+    concurrently.
     """
     
-    def __init__(self):
-        """Initialize MediaPipe models and pipeline components."""
-        # MediaPipe Face Mesh for facial landmarks
-        self.mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=2,  # To detect multiple faces for integrity enforcement
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    # Upper bound on cached non-analysis outputs; some reasons embed
+    # exception text, so the set of distinct reasons is not fixed
+    OUTPUT_CACHE_SIZE = 64
+    
+    def __init__(self, session_manager: Optional[SessionManager] = None):
+        """
+        Initialize pipeline components.
         
-        # MediaPipe Pose for posture analysis
-        self.mp_pose = mp.solutions.pose.Pose(
-            static_image_mode=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        MediaPipe models are created lazily per thread (see _get_thread_models).
         
+        Args:
+            session_manager: Session store to use. A new manager is created
+                if omitted.
+        """
         # Session manager
-        self.session_manager = SessionManager()
+        self.session_manager = session_manager if session_manager is not None else SessionManager()
         
         # Integrity enforcer
         self.integrity_enforcer = IntegrityEnforcer(multi_face_threshold=15)
+        
+        # Prebuilt insufficient-data / cancelled / skipped outputs, keyed by
+        # (kind, reason). These depend only on the reason, so each is
+        # validated by Pydantic once and copied afterwards.
+        self._output_cache: Dict[tuple, Dict[str, Any]] = {}
     
     def process_frame(
         self,
         session_id: str,
-        frame: np.ndarray
+        frame: np.ndarray,
+        is_rgb: bool = False
     ) -> Dict[str, Any]:
         """
         Process a single frame through the strict pipeline.
@@ -95,13 +146,15 @@ class NonVerbalAnalyzer:
         
         Args:
             session_id: Unique session identifier
-            frame: Input frame (BGR numpy array)
+            frame: Input frame (BGR numpy array, or RGB if is_rgb)
+            is_rgb: Frame is already RGB; skips the color conversion stage
             
         Returns:
             Dictionary with analysis results (conforms to output schema)
         """
         # Get or create session
         state = self.session_manager.get_or_create_session(session_id)
+        face_mesh, pose = _get_thread_models()
         
         # Check if session is cancelled
         if not state.can_process_frame():
@@ -113,7 +166,7 @@ class NonVerbalAnalyzer:
             return self._generate_insufficient_data_output(result.error)
         
         # Create pipeline context
-        context = PipelineContext(frame, state)
+        context = PipelineContext(frame, state, is_rgb)
         
         # Stage 2: Convert to RGB
         result = convert_to_rgb(context)
@@ -121,7 +174,7 @@ class NonVerbalAnalyzer:
             return self._generate_insufficient_data_output(result.error)
         
         # Stage 3: Detect faces
-        result = detect_faces(context, self.mp_face_mesh)
+        result = detect_faces(context, face_mesh)
         if not result.success:
             return self._generate_insufficient_data_output(result.error)
         
@@ -159,7 +212,7 @@ class NonVerbalAnalyzer:
             return self._generate_insufficient_data_output(result.error)
         
         # Stage 9: Analyze posture
-        result = analyze_posture(context, self.mp_pose)
+        result = analyze_posture(context, pose)
         if not result.success:
             return self._generate_insufficient_data_output(result.error)
         
@@ -189,7 +242,8 @@ class NonVerbalAnalyzer:
             state: Session state with accumulated metrics
             
         Returns:
-            Dictionary conforming to AnalysisOutput schema
+            Dictionary conforming to AnalysisOutput schema (built as a plain
+            dict; this runs every frame and the inputs are already in range)
         """
         # Eye contact score
         eye_contact_score = get_eye_contact_score(state) if state.total_processed_frames > 0 else None
@@ -197,20 +251,20 @@ class NonVerbalAnalyzer:
         # Facial expression score (engagement) - per spec 8.2
         # Score = normalized_variance × 100
         # Low variance → flat, Moderate → neutral, Healthy → engaged
-        if len(state.facial_engagement_scores) > 0:
-            avg_engagement = np.mean(state.facial_engagement_scores)
+        if state.facial_engagement_count > 0:
+            avg_engagement = state.facial_engagement_sum / state.facial_engagement_count
             # Spec says: normalized_variance × 100
             # Typical normalized variance is 0.001-0.05, so we scale appropriately
             # 0.01 normalized → 50%, 0.02 → 100% (capped)
-            expr_score = min(100, avg_engagement * 5000)
+            expr_score = min(100, avg_engagement * ENGAGEMENT_SCORE_SCALE)
         else:
             expr_score = None
         
         # Posture score
-        posture_score = np.mean(state.posture_scores) if len(state.posture_scores) > 0 else None
+        posture_score = state.posture_sum / state.posture_count if state.posture_count > 0 else None
         
         # Stability score
-        stability_score = np.mean(state.stability_scores) if len(state.stability_scores) > 0 else None
+        stability_score = state.stability_sum / state.stability_count if state.stability_count > 0 else None
         
         # Final score (weighted average)
         # Only compute if all component scores are available
@@ -228,32 +282,29 @@ class NonVerbalAnalyzer:
         def round_score(s):
             return round(s, 2) if s is not None else None
         
-        scores = NonVerbalScores(
-            eye_contact=round_score(eye_contact_score),
-            facial_expression=round_score(expr_score),
-            posture=round_score(posture_score),
-            stability=round_score(stability_score),
-            final_non_verbal_score=round_score(final_score)
-        )
+        scores = {
+            "eye_contact": round_score(eye_contact_score),
+            "facial_expression": round_score(expr_score),
+            "posture": round_score(posture_score),
+            "stability": round_score(stability_score),
+            "final_non_verbal_score": round_score(final_score)
+        }
         
         # Generate insights
-        insights = []
-        if eye_contact_score is not None and eye_contact_score < 60:
-            insights.append("Eye contact was inconsistent")
-        if posture_score is not None and posture_score < 60:
-            insights.append("Posture needs improvement")
-        if stability_score is not None and stability_score < 60:
-            insights.append("Frequent movement detected; try to remain still")
-        if expr_score is not None and expr_score < 30:
-            insights.append("Facial engagement appears low")
-        
-        output = AnalysisOutput(
-            session_status="active",
-            non_verbal_scores=scores,
-            insights=insights
-        )
+        insights = [
+            message
+            for value, (threshold, message) in zip(
+                (eye_contact_score, posture_score, stability_score, expr_score),
+                INSIGHT_RULES
+            )
+            if value is not None and value < threshold
+        ]
         
-        return output.dict()
+        return {
+            "session_status": "active",
+            "non_verbal_scores": scores,
+            "insights": insights
+        }
     
     def _generate_insufficient_data_output(self, reason: str) -> Dict[str, Any]:
         """
@@ -265,11 +316,13 @@ class NonVerbalAnalyzer:
         Returns:
             Dictionary conforming to InsufficientDataOutput schema
         """
-        output = InsufficientDataOutput(
-            reason=reason,
-            insights=["Insufficient data to compute metrics"]
+        return self._cached_output(
+            "insufficient", reason,
+            lambda: InsufficientDataOutput(
+                reason=reason,
+                insights=["Insufficient data to compute metrics"]
+            )
         )
-        return output.dict()
     
     def _generate_cancelled_output(self, reason: str) -> Dict[str, Any]:
         """
@@ -281,11 +334,13 @@ class NonVerbalAnalyzer:
         Returns:
             Dictionary conforming to CancelledSessionOutput schema
         """
-        output = CancelledSessionOutput(
-            cancellation_reason=reason,
-            insights=["Session cancelled due to integrity violation"]
+        return self._cached_output(
+            "cancelled", reason,
+            lambda: CancelledSessionOutput(
+                cancellation_reason=reason,
+                insights=["Session cancelled due to integrity violation"]
+            )
         )
-        return output.dict()
     
     def _generate_skipped_frame_output(self, reason: str) -> Dict[str, Any]:
         """
@@ -299,11 +354,38 @@ class NonVerbalAnalyzer:
         Returns:
             Dictionary conforming to SkippedFrameOutput schema
         """
-        output = SkippedFrameOutput(
-            skip_reason=reason,
-            insights=[]
+        return self._cached_output(
+            "skipped", reason,
+            lambda: SkippedFrameOutput(
+                skip_reason=reason,
+                insights=[]
+            )
         )
-        return output.dict()
+    
+    def _cached_output(self, kind: str, reason: str, build) -> Dict[str, Any]:
+        """
+        Return a copy of the cached output for (kind, reason), building it on first use.
+        
+        The copy is shallow: callers may replace top-level keys but must not
+        mutate the nested scores dict or insights list.
+        
+        Args:
+            kind: Output type key
+            reason: Reason string the output depends on
+            build: Callable returning the Pydantic output model
+            
+        Returns:
+            Dictionary conforming to the built model's schema
+        """
+        key = (kind, reason)
+        cached = self._output_cache.get(key)
+        if cached is None:
+            cached = build().dict()
+            if len(self._output_cache) < self.OUTPUT_CACHE_SIZE:
+                self._output_cache[key] = cached
+            else:
+                return cached
+        return cached.copy()
     
     def get_session_summary(self, session_id: str) -> Dict[str, Any]:
         """
@@ -3,9 +3,10 @@ Eye contact analysis with strict blink exclusion.
 Isolates eye contact logic to ensure blink frames are completely excluded.
 """
 import numpy as np
+from numba import njit
 from typing import List, Any
-from .pipeline import PipelineResult, PipelineContext
-from .utils import calculate_ear
+from .pipeline import PipelineResult, PipelineContext, STAGE_DIAGNOSTICS
+from .utils import calculate_ears
 from .validators import is_blink_frame
 
 
@@ -14,6 +15,7 @@ from .validators import is_blink_frame
 # Right eye: 33, 160, 158, 133, 153, 144
 LEFT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
 RIGHT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
+BOTH_EYES_INDICES = np.array([LEFT_EYE_INDICES, RIGHT_EYE_INDICES])
 
 # Iris landmarks for gaze estimation
 LEFT_IRIS_INDEX = 468
@@ -25,6 +27,12 @@ LEFT_EYE_OUTER_CORNER = 263
 RIGHT_EYE_OUTER_CORNER = 33
 RIGHT_EYE_INNER_CORNER = 133
 
+# Upper/lower eyelid landmarks for vertical gaze
+LEFT_EYE_UPPER_LID = 386
+LEFT_EYE_LOWER_LID = 374
+RIGHT_EYE_UPPER_LID = 159
+RIGHT_EYE_LOWER_LID = 145
+
 
 def analyze_eye_contact(context: PipelineContext, blink_threshold: float = 0.2) -> PipelineResult:
     """
@@ -48,20 +56,17 @@ def analyze_eye_contact(context: PipelineContext, blink_threshold: float = 0.2)
     if context.face_width is None:
         return PipelineResult.error_result("Face width not available for normalization")
     
-    landmarks = context.landmarks
+    landmarks_np = context.landmarks_np
     
-    # Step 1: Extract eye landmarks
+    # Step 1: Extract both eyes' landmarks as one (2, 6, 3) array
     try:
-        left_eye = [landmarks[i] for i in LEFT_EYE_INDICES]
-        right_eye = [landmarks[i] for i in RIGHT_EYE_INDICES]
+        eyes = landmarks_np[BOTH_EYES_INDICES]
     except IndexError as e:
         return PipelineResult.error_result(f"Invalid eye landmark indices: {str(e)}")
     
-    # Step 2: Calculate Eye Aspect Ratio (EAR)
+    # Step 2: Calculate Eye Aspect Ratio (EAR) for both eyes in one call
     try:
-        left_ear = calculate_ear(left_eye)
-        right_ear = calculate_ear(right_eye)
-        avg_ear = (left_ear + right_ear) / 2.0
+        avg_ear = float(calculate_ears(eyes).mean())
     except Exception as e:
         return PipelineResult.error_result(f"Failed to calculate EAR: {str(e)}")
     
@@ -74,7 +79,7 @@ def analyze_eye_contact(context: PipelineContext, blink_threshold: float = 0.2)
     
     # Step 4: Estimate gaze (normalized by face width)
     try:
-        gaze_detected = _estimate_gaze_normalized(landmarks, context.face_width)
+        gaze_detected = _estimate_gaze_normalized(landmarks_np, context.face_width)
     except Exception as e:
         return PipelineResult.error_result(f"Failed to estimate gaze: {str(e)}")
     
@@ -85,13 +90,15 @@ def analyze_eye_contact(context: PipelineContext, blink_threshold: float = 0.2)
     context.session_state.total_processed_frames += 1
     context.eye_contact_detected = gaze_detected
     
+    if not STAGE_DIAGNOSTICS:
+        return PipelineResult.success_result()
     return PipelineResult.success_result({
         "gaze_detected": gaze_detected,
         "ear": avg_ear
     })
 
 
-def _estimate_gaze_normalized(landmarks: Any, face_width: float) -> bool:
+def _estimate_gaze_normalized(landmarks_np: np.ndarray, face_width: float) -> bool:
     """
     Estimate if user is looking at camera using normalized iris positions.
     
@@ -99,60 +106,65 @@ def _estimate_gaze_normalized(landmarks: Any, face_width: float) -> bool:
     This uses iris position relative to eye corners to determine if looking at camera.
     
     Args:
-        landmarks: MediaPipe face landmarks
-        face_width: Face width for normalization
+        landmarks_np: (N, 3) landmark coordinates from extract_landmarks
+        face_width: Face width for normalization (cancels out of the ratios)
         
     Returns:
         True if gaze is toward camera, False otherwise
     """
-    def get_gaze_ratio(iris_idx: int, inner_corner_idx: int, outer_corner_idx: int) -> float:
-        """Calculate normalized gaze ratio for one eye (horizontal)."""
-        iris = landmarks[iris_idx]
-        inner = landmarks[inner_corner_idx]
-        outer = landmarks[outer_corner_idx]
-        
-        # Distance from iris to corners (normalized by face width)
-        d_inner = np.sqrt((iris.x - inner.x)**2 + (iris.y - inner.y)**2) / face_width
-        d_outer = np.sqrt((iris.x - outer.x)**2 + (iris.y - outer.y)**2) / face_width
-        
-        if d_outer == 0:
-            return 1.0  # Assume centered
-        
-        return d_inner / d_outer
-    
-    def get_vertical_gaze(iris_idx: int, upper_lid_idx: int, lower_lid_idx: int) -> float:
-        """Calculate vertical gaze position (0 = looking down, 1 = looking up)."""
-        iris = landmarks[iris_idx]
-        upper = landmarks[upper_lid_idx]
-        lower = landmarks[lower_lid_idx]
-        
-        eye_height = abs(upper.y - lower.y)
-        if eye_height == 0:
-            return 0.5
-        
-        # Position of iris relative to eye center
-        eye_center_y = (upper.y + lower.y) / 2
-        iris_relative = (iris.y - eye_center_y) / eye_height
-        
-        return 0.5 - iris_relative  # Normalize so 0.5 = centered
+    return bool(_gaze_kernel(landmarks_np))
+
+
+@njit(cache=True, fastmath=True)
+def _gaze_ratio_sq(lm, iris_idx, inner_idx, outer_idx):
+    """
+    Squared horizontal gaze ratio for one eye.
     
-    # Calculate horizontal gaze ratio for both eyes
+    (iris-to-inner / iris-to-outer corner distance)**2; only ever compared
+    against squared thresholds, so no sqrt is needed.
+    """
+    ix = lm[iris_idx, 0]
+    iy = lm[iris_idx, 1]
+    d_inner_sq = (ix - lm[inner_idx, 0])**2 + (iy - lm[inner_idx, 1])**2
+    d_outer_sq = (ix - lm[outer_idx, 0])**2 + (iy - lm[outer_idx, 1])**2
+    if d_outer_sq == 0:
+        return 1.0  # Assume centered
+    return d_inner_sq / d_outer_sq
+
+
+@njit(cache=True, fastmath=True)
+def _vertical_gaze(lm, iris_idx, upper_idx, lower_idx):
+    """Vertical gaze position (0 = looking down, 1 = looking up, 0.5 = centered)."""
+    upper_y = lm[upper_idx, 1]
+    lower_y = lm[lower_idx, 1]
+    eye_height = abs(upper_y - lower_y)
+    if eye_height == 0:
+        return 0.5
+    
+    # Position of iris relative to eye center
+    eye_center_y = (upper_y + lower_y) / 2
+    return 0.5 - (lm[iris_idx, 1] - eye_center_y) / eye_height
+
+
+@njit(cache=True, fastmath=True)
+def _gaze_kernel(lm):
+    # Calculate squared horizontal gaze ratio for both eyes
     # Centered iris = ratio close to 1.0
-    ratio_left = get_gaze_ratio(LEFT_IRIS_INDEX, LEFT_EYE_INNER_CORNER, LEFT_EYE_OUTER_CORNER)
-    ratio_right = get_gaze_ratio(RIGHT_IRIS_INDEX, RIGHT_EYE_INNER_CORNER, RIGHT_EYE_OUTER_CORNER)
+    ratio_left = _gaze_ratio_sq(lm, LEFT_IRIS_INDEX, LEFT_EYE_INNER_CORNER, LEFT_EYE_OUTER_CORNER)
+    ratio_right = _gaze_ratio_sq(lm, RIGHT_IRIS_INDEX, RIGHT_EYE_INNER_CORNER, RIGHT_EYE_OUTER_CORNER)
     
     # Calculate vertical gaze for both eyes
-    # Upper/lower lid indices: left eye (386, 374), right eye (159, 145)
-    vert_left = get_vertical_gaze(LEFT_IRIS_INDEX, 386, 374)
-    vert_right = get_vertical_gaze(RIGHT_IRIS_INDEX, 159, 145)
+    vert_left = _vertical_gaze(lm, LEFT_IRIS_INDEX, LEFT_EYE_UPPER_LID, LEFT_EYE_LOWER_LID)
+    vert_right = _vertical_gaze(lm, RIGHT_IRIS_INDEX, RIGHT_EYE_UPPER_LID, RIGHT_EYE_LOWER_LID)
     
     # RELAXED THRESHOLDS - centered = looking at camera
-    # Horizontal: ratio should be close to 1.0 (0.6 to 1.6)
+    # Horizontal: ratio should be close to 1.0 (0.6 to 1.6, i.e. 0.36 to 2.56 squared)
     # Vertical: should be close to 0.5 (0.2 to 0.8)
-    horizontal_ok = 0.6 < ratio_left < 1.6 and 0.6 < ratio_right < 1.6
-    vertical_ok = 0.2 < vert_left < 0.8 and 0.2 < vert_right < 0.8
+    # Bitwise & keeps the comparisons branch-free
+    horizontal_ok = (0.36 < ratio_left) & (ratio_left < 2.56) & (0.36 < ratio_right) & (ratio_right < 2.56)
+    vertical_ok = (0.2 < vert_left) & (vert_left < 0.8) & (0.2 < vert_right) & (vert_right < 0.8)
     
-    return horizontal_ok and vertical_ok
+    return horizontal_ok & vertical_ok
 
 
 def get_eye_contact_score(session_state: Any) -> float:
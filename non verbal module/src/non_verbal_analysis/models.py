@@ -2,7 +2,7 @@
 Strict output schema models.
 Enforces type safety and validation for all analysis outputs.
 """
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
@@ -11,20 +11,14 @@ class NonVerbalScores(BaseModel):
     Non-verbal analysis scores.
     
     All scores are Optional to support null values when data is insufficient.
-    Valid scores are in range [0.0, 100.0].
+    Valid scores are in range [0.0, 100.0], enforced by field constraints
+    (checked in pydantic-core on pydantic 2).
     """
-    eye_contact: Optional[float] = None
-    facial_expression: Optional[float] = None
-    posture: Optional[float] = None
-    stability: Optional[float] = None
-    final_non_verbal_score: Optional[float] = None
-    
-    @validator('eye_contact', 'facial_expression', 'posture', 'stability', 'final_non_verbal_score')
-    def validate_score_range(cls, v):
-        """Validate that scores are in valid range [0, 100]."""
-        if v is not None and (v < 0 or v > 100):
-            raise ValueError(f"Score must be between 0 and 100, got {v}")
-        return v
+    eye_contact: Optional[float] = Field(default=None, ge=0, le=100)
+    facial_expression: Optional[float] = Field(default=None, ge=0, le=100)
+    posture: Optional[float] = Field(default=None, ge=0, le=100)
+    stability: Optional[float] = Field(default=None, ge=0, le=100)
+    final_non_verbal_score: Optional[float] = Field(default=None, ge=0, le=100)
 
 
 class AnalysisOutput(BaseModel):
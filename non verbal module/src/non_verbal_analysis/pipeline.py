@@ -2,6 +2,7 @@
 Strict processing pipeline for non-verbal analysis.
 Enforces stage execution order and provides clear contracts for each stage.
 """
+import threading
 import cv2
 import numpy as np
 import mediapipe as mp
@@ -10,6 +11,28 @@ from dataclasses import dataclass
 from enum import Enum
 
 
+# Parallelism comes from running sessions on separate worker threads, so
+# OpenCV calls (resize, cvtColor, imdecode) stay single-threaded instead of
+# each fanning out over every core. OpenCL init only adds overhead here.
+cv2.setNumThreads(1)
+cv2.ocl.setUseOpenCL(False)
+
+
+# Frames are downscaled so their long edge is at most this many pixels before
+# color conversion and MediaPipe. Landmarks are normalized to [0, 1], so the
+# scale does not change any downstream metric.
+TARGET_LONG_EDGE = 480
+
+# Pose inference runs on every POSE_STRIDE-th analyzed frame; frames in
+# between carry the last posture score forward (posture changes slowly)
+POSE_STRIDE = 3
+
+# Attach per-stage diagnostic data dicts to successful results. Off by
+# default: nothing on the happy path reads them, so stages return the shared
+# success result instead of allocating a result and a dict per frame.
+STAGE_DIAGNOSTICS = False
+
+
 class PipelineStage(Enum):
     """Enumeration of pipeline stages in execution order."""
     VALIDATE_FRAME = 1
@@ -47,7 +70,9 @@ class PipelineResult:
     
     @staticmethod
     def success_result(data: Any = None) -> 'PipelineResult':
-        """Create a successful result."""
+        """Create a successful result (shared instance when there is no data; do not mutate)."""
+        if data is None:
+            return _SUCCESS
         return PipelineResult(success=True, data=data)
     
     @staticmethod
@@ -74,20 +99,27 @@ class PipelineResult:
         )
 
 
+_SUCCESS = PipelineResult(success=True)
+
+
 class PipelineContext:
     """
     Context object passed through pipeline stages.
     Accumulates data from each stage for use by subsequent stages.
     """
-    def __init__(self, frame: np.ndarray, session_state: Any):
+    def __init__(self, frame: np.ndarray, session_state: Any, is_rgb: bool = False):
         self.frame = frame
         self.session_state = session_state
+        self.is_rgb = is_rgb
         
         # Stage outputs
         self.rgb_frame: Optional[np.ndarray] = None
+        self.scale: float = 1.0  # rgb_frame size relative to frame
         self.face_results: Optional[Any] = None
         self.landmarks: Optional[Any] = None
+        self.landmarks_np: Optional[np.ndarray] = None  # (N, 3) float32 x, y, z
         self.face_width: Optional[float] = None
+        self.inv_face_width: Optional[float] = None  # 1 / face_width, set with it
         self.pose_results: Optional[Any] = None
         
         # Analysis results
@@ -95,6 +127,10 @@ class PipelineContext:
         self.facial_engagement: Optional[float] = None
         self.posture_score: Optional[float] = None
         self.stability_score: Optional[float] = None
+        
+        # (normalized engagement, normalized nose movement), computed once
+        # and shared by the facial expression and stability stages
+        self.frame_motion: Optional[tuple] = None
 
 
 def validate_frame(frame: np.ndarray) -> PipelineResult:
@@ -119,13 +155,38 @@ def validate_frame(frame: np.ndarray) -> PipelineResult:
     if len(frame.shape) != 3:
         return PipelineResult.error_result(f"Frame must be 3D array (H, W, C), got shape {frame.shape}")
     
+    if not STAGE_DIAGNOSTICS:
+        return PipelineResult.success_result()
     return PipelineResult.success_result({"frame_shape": frame.shape})
 
 
+# Scratch frames for convert_to_rgb, owned by the processing thread rather
+# than the session: a thread handles one frame at a time, and dead sessions
+# do not pin full-frame buffers until they are evicted.
+_thread_buffers = threading.local()
+
+
+def _thread_buffer(name: str, shape: tuple, dtype) -> np.ndarray:
+    """Return this thread's scratch array `name`, reallocating it only if the shape or dtype changed."""
+    buf = getattr(_thread_buffers, name, None)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = np.empty(shape, dtype=dtype)
+        setattr(_thread_buffers, name, buf)
+    return buf
+
+
 def convert_to_rgb(context: PipelineContext) -> PipelineResult:
     """
     Convert BGR frame to RGB for MediaPipe processing.
     
+    Frames larger than TARGET_LONG_EDGE are downscaled first, so the
+    conversion and MediaPipe touch fewer pixels. Frames that are already
+    RGB (context.is_rgb) skip the conversion.
+    
+    Output goes into per-thread scratch buffers that are reused every
+    frame; context.rgb_frame is only valid until this thread processes
+    its next frame.
+    
     Args:
         context: Pipeline context
         
@@ -133,7 +194,25 @@ def convert_to_rgb(context: PipelineContext) -> PipelineResult:
         PipelineResult with RGB frame
     """
     try:
-        context.rgb_frame = cv2.cvtColor(context.frame, cv2.COLOR_BGR2RGB)
+        frame = context.frame
+        h, w = frame.shape[:2]
+        scale = TARGET_LONG_EDGE / max(h, w)
+        if scale < 1.0:
+            new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+            small = _thread_buffer("small_buf", (new_h, new_w) + frame.shape[2:], frame.dtype)
+            frame = cv2.resize(frame, (new_w, new_h), dst=small, interpolation=cv2.INTER_AREA)
+            context.scale = scale
+        
+        if context.is_rgb:
+            context.rgb_frame = frame
+        else:
+            rgb = _thread_buffer("rgb_buf", frame.shape, frame.dtype)
+            if frame.dtype == np.uint8:
+                # Channel-reversing copy straight into the reused buffer
+                np.copyto(rgb, frame[..., ::-1])
+            else:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+            context.rgb_frame = rgb
         return PipelineResult.success_result()
     except Exception as e:
         return PipelineResult.error_result(f"Failed to convert frame to RGB: {str(e)}")
@@ -160,6 +239,8 @@ def detect_faces(context: PipelineContext, face_mesh) -> PipelineResult:
         if not face_results.multi_face_landmarks:
             return PipelineResult.error_result("No face detected")
         
+        if not STAGE_DIAGNOSTICS:
+            return PipelineResult.success_result()
         return PipelineResult.success_result({
             "face_count": len(face_results.multi_face_landmarks)
         })
@@ -183,13 +264,16 @@ def enforce_single_face_rule(context: PipelineContext, multi_face_threshold: int
     
     face_count = len(context.face_results.multi_face_landmarks) if context.face_results.multi_face_landmarks else 0
     
-    if face_count > 1:
-        context.session_state.multi_face_counter += 1
-        if context.session_state.multi_face_counter >= multi_face_threshold:
-            return PipelineResult.cancel_session_result("multiple_faces_detected")
-    else:
-        context.session_state.multi_face_counter = 0
+    # Consecutive multi-face frames: increment, or reset to 0 on a single
+    # face, without branching (threshold is always >= 1)
+    state = context.session_state
+    multi = int(face_count > 1)
+    state.multi_face_counter = (state.multi_face_counter + multi) * multi
+    if state.multi_face_counter >= multi_face_threshold:
+        return PipelineResult.cancel_session_result("multiple_faces_detected")
     
+    if not STAGE_DIAGNOSTICS:
+        return PipelineResult.success_result()
     return PipelineResult.success_result({"face_count": face_count})
 
 
@@ -207,8 +291,18 @@ def extract_landmarks(context: PipelineContext) -> PipelineResult:
         return PipelineResult.error_result("No face landmarks available")
     
     # Use first face only
-    context.landmarks = context.face_results.multi_face_landmarks[0].landmark
+    landmarks = context.face_results.multi_face_landmarks[0].landmark
+    context.landmarks = landmarks
     
+    # Copy coordinates out of the protobuf once for the numeric stages
+    context.landmarks_np = np.fromiter(
+        (v for lm in landmarks for v in (lm.x, lm.y, lm.z)),
+        dtype=np.float32,
+        count=3 * len(landmarks)
+    ).reshape(-1, 3)
+    
+    if not STAGE_DIAGNOSTICS:
+        return PipelineResult.success_result()
     return PipelineResult.success_result({
         "landmark_count": len(context.landmarks)
     })
@@ -231,19 +325,37 @@ def normalize_by_face_size(context: PipelineContext) -> PipelineResult:
         return PipelineResult.error_result("Landmarks not available")
     
     try:
-        face_width = get_face_width(context.landmarks)
+        face_width = get_face_width(context.landmarks_np)
         
         if not is_valid_face_width(face_width):
             return PipelineResult.error_result(f"Invalid face width: {face_width}")
         
         context.face_width = face_width
-        context.session_state.face_width_history.append(face_width)
+        context.inv_face_width = 1.0 / face_width
+        context.session_state.add_face_width(face_width)
         
+        if not STAGE_DIAGNOSTICS:
+            return PipelineResult.success_result()
         return PipelineResult.success_result({"face_width": face_width})
     except Exception as e:
         return PipelineResult.error_result(f"Failed to compute face width: {str(e)}")
 
 
+def _get_frame_motion(context: PipelineContext) -> tuple:
+    """Compute (or reuse) this frame's fused engagement/nose movement metrics."""
+    from .utils import calculate_frame_motion
+    
+    if context.frame_motion is None:
+        state = context.session_state
+        context.frame_motion = calculate_frame_motion(
+            context.landmarks_np,
+            state.previous_landmarks,
+            state.previous_nose_pos,
+            context.inv_face_width
+        )
+    return context.frame_motion
+
+
 def analyze_facial_expression(context: PipelineContext) -> PipelineResult:
     """
     Stage 7: Analyze facial expression (engagement) with normalization.
@@ -257,8 +369,6 @@ def analyze_facial_expression(context: PipelineContext) -> PipelineResult:
     Returns:
         PipelineResult with engagement score
     """
-    from .utils import calculate_landmark_variance
-    
     if context.landmarks is None:
         return PipelineResult.error_result("Landmarks not available")
     
@@ -272,16 +382,14 @@ def analyze_facial_expression(context: PipelineContext) -> PipelineResult:
     
     try:
         # Calculate normalized landmark variance
-        normalized_engagement = calculate_landmark_variance(
-            context.landmarks,
-            context.session_state.previous_landmarks,
-            context.face_width
-        )
+        normalized_engagement = _get_frame_motion(context)[0]
         
         # Store for accumulation
-        context.session_state.facial_engagement_scores.append(normalized_engagement)
+        context.session_state.add_facial_engagement(normalized_engagement)
         context.facial_engagement = normalized_engagement
         
+        if not STAGE_DIAGNOSTICS:
+            return PipelineResult.success_result()
         return PipelineResult.success_result({"engagement": normalized_engagement})
     except Exception as e:
         return PipelineResult.error_result(f"Failed to analyze facial expression: {str(e)}")
@@ -301,20 +409,32 @@ def analyze_posture(context: PipelineContext, pose_detector) -> PipelineResult:
     Returns:
         PipelineResult with posture evaluation
     """
-    from .utils import normalize_posture_alignment
-    
     if context.rgb_frame is None:
         return PipelineResult.error_result("RGB frame not available")
     
     if context.face_width is None:
         return PipelineResult.error_result("Face width not available for normalization")
     
+    state = context.session_state
+    
+    # Between pose frames, carry the last score forward
+    if state.frame_idx % POSE_STRIDE != 0 and state.last_posture_score is not None:
+        state.add_posture_score(state.last_posture_score)
+        context.posture_score = state.last_posture_score
+        if not STAGE_DIAGNOSTICS:
+            return PipelineResult.success_result()
+        return PipelineResult.success_result({
+            "posture_score": context.posture_score,
+            "carried_forward": True
+        })
+    
     try:
         pose_results = pose_detector.process(context.rgb_frame)
         context.pose_results = pose_results
         
         if not pose_results.pose_landmarks:
-            # No pose detected - return None score
+            # No pose detected - return None score; re-run pose next frame
+            state.last_posture_score = None
             return PipelineResult.success_result({"posture_score": None, "reason": "no_pose_detected"})
         
         landmarks = pose_results.pose_landmarks.landmark
@@ -333,18 +453,21 @@ def analyze_posture(context: PipelineContext, pose_detector) -> PipelineResult:
         # Shoulder tilt (raw)
         raw_shoulder_tilt = abs(l_shoulder.y - r_shoulder.y)
         
-        # Normalize by face width
-        normalized_alignment = normalize_posture_alignment(raw_alignment_error, context.face_width)
-        normalized_tilt = normalize_posture_alignment(raw_shoulder_tilt, context.face_width)
+        # Normalize by face width (validated in normalize_by_face_size)
+        normalized_alignment = raw_alignment_error * context.inv_face_width
+        normalized_tilt = raw_shoulder_tilt * context.inv_face_width
         
         # SPEC 8.3: Determine if this frame has "good posture"
         # RELAXED: Good posture = alignment < 0.25 AND tilt < 0.15 (normalized thresholds)
         is_good_posture = normalized_alignment < 0.25 and normalized_tilt < 0.15
         
         # Store binary result (1 = good, 0 = poor)
-        context.session_state.posture_scores.append(100.0 if is_good_posture else 0.0)
         context.posture_score = 100.0 if is_good_posture else 0.0
+        state.add_posture_score(context.posture_score)
+        state.last_posture_score = context.posture_score
         
+        if not STAGE_DIAGNOSTICS:
+            return PipelineResult.success_result()
         return PipelineResult.success_result({
             "posture_score": context.posture_score,
             "is_good_posture": is_good_posture,
@@ -370,9 +493,6 @@ def analyze_stability(context: PipelineContext) -> PipelineResult:
     Returns:
         PipelineResult with stability score
     """
-    from .utils import calculate_nose_movement
-    from .validators import validate_score_range
-    
     if context.landmarks is None:
         return PipelineResult.error_result("Landmarks not available")
     
@@ -385,26 +505,21 @@ def analyze_stability(context: PipelineContext) -> PipelineResult:
         return PipelineResult.success_result({"stability_score": None, "reason": "first_frame"})
     
     try:
-        # Get current nose position
-        nose = context.landmarks[1]  # Nose tip
-        
-        # Calculate normalized nose movement
-        normalized_movement = calculate_nose_movement(
-            nose,
-            context.session_state.previous_nose_pos,
-            context.face_width
-        )
+        # Calculate normalized nose tip movement
+        normalized_movement = _get_frame_motion(context)[1]
         
         # SPEC 8.4: Stability Score = 1 − normalized_movement_variance
         # Scaled to 0-100
         # Typical normalized movement: 0.001-0.02 for steady, 0.05+ for fidgeting
         # Scale factor: movement of 0.1 = 100% penalty (fully unstable)
-        stability_score = (1 - min(1.0, normalized_movement * 10)) * 100
-        stability_score = validate_score_range(stability_score, 0, 100)
+        # Same as (1 - min(1, m * 10)) * 100 clamped to [0, 100], since m >= 0
+        stability_score = max(0.0, 100.0 - normalized_movement * 1000.0)
         
-        context.session_state.stability_scores.append(stability_score)
+        context.session_state.add_stability_score(stability_score)
         context.stability_score = stability_score
         
+        if not STAGE_DIAGNOSTICS:
+            return PipelineResult.success_result()
         return PipelineResult.success_result({"stability_score": stability_score})
     except Exception as e:
         return PipelineResult.error_result(f"Failed to analyze stability: {str(e)}")
@@ -425,11 +540,14 @@ def update_session_state(context: PipelineContext) -> PipelineResult:
     if context.landmarks is None:
         return PipelineResult.error_result("Landmarks not available")
     
-    # Update temporal state for next frame
-    context.session_state.previous_landmarks = context.landmarks
+    context.session_state.frame_idx += 1
+    
+    # Update temporal state for next frame. landmarks_np is built fresh each
+    # frame, so the array can be kept without copying.
+    context.session_state.previous_landmarks = context.landmarks_np
     
-    # Update nose position for stability tracking (3D for depth detection)
-    nose = context.landmarks[1]  # Nose tip
-    context.session_state.previous_nose_pos = (nose.x, nose.y, nose.z)
+    # Update nose position for stability tracking (3D for depth detection):
+    # a view into the kept landmark array, so no copy is needed
+    context.session_state.previous_nose_pos = context.landmarks_np[1]  # Nose tip
     
-    return PipelineResult.success_result({"state_updated": True})
+    return PipelineResult.success_result()
@@ -3,7 +3,8 @@ Authoritative session state management.
 Manages session lifecycle, validation, and temporal continuity.
 """
 import time
-from typing import Dict, Any, List, Optional
+import numpy as np
+from typing import Dict, List, Optional
 
 
 class SessionState:
@@ -17,6 +18,9 @@ class SessionState:
     # Blink buffer size for temporal blink detection
     BLINK_BUFFER_SIZE = 3
     
+    # Number of recent face widths kept for the average (~60s at 5 FPS)
+    FACE_WIDTH_WINDOW = 300
+    
     def __init__(self):
         # Session metadata
         self.start_time = time.time()
@@ -24,19 +28,32 @@ class SessionState:
         self.cancellation_reason: Optional[str] = None
         
         # Temporal state (frame-to-frame)
-        self.previous_landmarks: Optional[Any] = None
-        self.previous_nose_pos: Optional[tuple] = None
-        self.face_width_history: List[float] = []
+        self.previous_landmarks: Optional[np.ndarray] = None  # (N, 3) float32
+        self.previous_nose_pos: Optional[np.ndarray] = None  # view of previous_landmarks[1]
+        
+        # Ring buffer of recent face widths with a running sum
+        self.face_width_buf = np.zeros(self.FACE_WIDTH_WINDOW, dtype=np.float64)
+        self.fw_head: int = 0
+        self.fw_count: int = 0
+        self.fw_sum: float = 0.0
         
         # Counters (CRITICAL: blink frames are excluded)
         self.eye_contact_frames: int = 0
         self.total_processed_frames: int = 0
         self.multi_face_counter: int = 0
+        self.frame_idx: int = 0  # Frames that completed the pipeline
         
-        # Accumulators for scoring
-        self.facial_engagement_scores: List[float] = []
-        self.posture_scores: List[float] = []
-        self.stability_scores: List[float] = []
+        # Last computed posture score, carried between pose frames
+        self.last_posture_score: Optional[float] = None
+        
+        # Accumulators for scoring: running sums/counts, so averages are O(1)
+        # per frame and memory does not grow with session length
+        self.facial_engagement_sum: float = 0.0
+        self.facial_engagement_count: int = 0
+        self.posture_sum: float = 0.0
+        self.posture_count: int = 0
+        self.stability_sum: float = 0.0
+        self.stability_count: int = 0
         
         # Blink buffer for temporal blink detection
         self.blink_buffer: List[bool] = []
@@ -65,7 +82,7 @@ class SessionState:
             return True
         
         # If we have previous landmarks, we should also have face width history
-        if len(self.face_width_history) == 0:
+        if self.fw_count == 0:
             return False
         
         return True
@@ -92,18 +109,44 @@ class SessionState:
         """
         return self.previous_landmarks is not None
     
+    def add_facial_engagement(self, value: float) -> None:
+        """Record one frame's normalized facial engagement."""
+        self.facial_engagement_sum += value
+        self.facial_engagement_count += 1
+    
+    def add_posture_score(self, value: float) -> None:
+        """Record one frame's posture score."""
+        self.posture_sum += value
+        self.posture_count += 1
+    
+    def add_stability_score(self, value: float) -> None:
+        """Record one frame's stability score."""
+        self.stability_sum += value
+        self.stability_count += 1
+    
+    def add_face_width(self, value: float) -> None:
+        """Record one frame's face width, overwriting the oldest once the window is full."""
+        head = self.fw_head
+        if self.fw_count == self.FACE_WIDTH_WINDOW:
+            self.fw_sum -= float(self.face_width_buf[head])
+        else:
+            self.fw_count += 1
+        self.face_width_buf[head] = value
+        self.fw_sum += value
+        self.fw_head = (head + 1) % self.FACE_WIDTH_WINDOW
+    
     def get_average_face_width(self) -> Optional[float]:
         """
-        Get average face width from history.
+        Get average face width over the last FACE_WIDTH_WINDOW frames.
         
         This can be used for normalization when current face width is unavailable.
         
         Returns:
             Average face width or None if no history
         """
-        if len(self.face_width_history) == 0:
+        if self.fw_count == 0:
             return None
-        return sum(self.face_width_history) / len(self.face_width_history)
+        return self.fw_sum / self.fw_count
 
 
 class SessionManager:
@@ -126,6 +169,11 @@ class SessionManager:
         
         This is the primary method for retrieving session state.
         
+        Stability and engagement are frame-to-frame deltas, so callers that
+        read from a local camera should open it with CAP_PROP_BUFFERSIZE=1
+        (see run_demo.py); buffered frames add latency and compare stale
+        frames.
+        
         Args:
             session_id: Unique session identifier
             
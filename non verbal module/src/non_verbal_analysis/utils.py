@@ -2,12 +2,41 @@
 Utility functions for non-verbal analysis.
 Provides normalization, landmark calculations, and geometric utilities.
 """
+from math import dist, sqrt
+
 import numpy as np
-from typing import List, Any
-from .validators import validate_normalization_inputs
+from numba import njit
+from typing import Any, Final
+
+# Optional SIMD distance kernels for the batch APIs; NumPy fallback otherwise
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+from .validators import FACE_WIDTH_ERROR
+
+
+# EAR point pairs within an eye's 6 landmarks: (p2, p6), (p3, p5), (p1, p4)
+_EAR_FROM = [1, 2, 0]
+_EAR_TO = [5, 4, 3]
+
+# SPEC 8.2: Use mouth, eyebrow, jaw landmarks for engagement
+# Mouth landmarks: 61 (right corner), 291 (left corner), 13 (upper lip), 14 (lower lip)
+# Eyebrow landmarks: 70 (right outer), 300 (left outer), 63 (right inner), 293 (left inner)
+# Jaw landmark: 152 (chin)
+# np.intp is NumPy's native index type, so take()/fancy indexing need no cast
+_ENGAGEMENT_IDX: Final = np.array([
+    61, 291, 13, 14,    # Mouth - 4 points
+    70, 300, 63, 293,   # Eyebrows - 4 points
+    152                  # Jaw - 1 point
+], dtype=np.intp)
+
+# Normalized engagement → 0-100 expression score (0.01 → 50, 0.02+ → 100)
+ENGAGEMENT_SCORE_SCALE = 5000
 
 
-def calculate_ear(eye_landmarks: List[Any]) -> float:
+def calculate_ear(eye_landmarks: np.ndarray) -> float:
     """
     Compute Eye Aspect Ratio (EAR) for blink detection.
     
@@ -15,7 +44,7 @@ def calculate_ear(eye_landmarks: List[Any]) -> float:
     where v1, v2 are vertical distances and h is horizontal distance.
     
     Args:
-        eye_landmarks: List of 6 MediaPipe landmarks for one eye
+        eye_landmarks: (6, 3) array of x, y, z for one eye's landmarks
                       Expected order: [p1, p2, p3, p4, p5, p6]
                       where p1-p4 is horizontal, p2-p6 and p3-p5 are vertical
     
@@ -28,16 +57,8 @@ def calculate_ear(eye_landmarks: List[Any]) -> float:
     if len(eye_landmarks) != 6:
         raise ValueError(f"Expected 6 eye landmarks, got {len(eye_landmarks)}")
     
-    def dist(p1, p2):
-        """Calculate Euclidean distance between two landmarks."""
-        return np.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2 + (p1.z - p2.z)**2)
-    
-    # Vertical distances (indices based on MediaPipe eye landmark structure)
-    v1 = dist(eye_landmarks[1], eye_landmarks[5])
-    v2 = dist(eye_landmarks[2], eye_landmarks[4])
-    
-    # Horizontal distance
-    h = dist(eye_landmarks[0], eye_landmarks[3])
+    # Vertical distances v1, v2 and horizontal distance h in one gather + norm
+    v1, v2, h = np.linalg.norm(eye_landmarks[_EAR_FROM] - eye_landmarks[_EAR_TO], axis=1)
     
     if h == 0:
         return 0.0
@@ -46,6 +67,28 @@ def calculate_ear(eye_landmarks: List[Any]) -> float:
     return ear
 
 
+def calculate_ears(eyes: np.ndarray) -> np.ndarray:
+    """
+    Compute Eye Aspect Ratio for several eyes at once.
+    
+    Same formula as calculate_ear, evaluated with one vectorized norm per
+    distance instead of a Python call per eye.
+    
+    Args:
+        eyes: (E, 6, 3) array, one row of 6 landmarks per eye (same order
+              as calculate_ear)
+    
+    Returns:
+        (E,) array of EARs; 0.0 where an eye's horizontal distance is zero
+    """
+    d = np.linalg.norm(eyes[:, _EAR_FROM] - eyes[:, _EAR_TO], axis=2)
+    v1, v2, h = d[:, 0], d[:, 1], d[:, 2]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ear = (v1 + v2) / (2.0 * h)
+    return np.where(h == 0, 0.0, ear)
+
+
 def normalize_movement(raw_movement: float, face_width: float, metric_name: str = "movement") -> float:
     """
     Normalize movement by face width to be camera-distance invariant.
@@ -64,9 +107,13 @@ def normalize_movement(raw_movement: float, face_width: float, metric_name: str
         Normalized movement value
     
     Raises:
-        ValueError: If face_width is invalid
+        ValueError: If face_width is invalid (checked unless run with -O)
     """
-    validate_normalization_inputs(raw_movement, face_width, metric_name)
+    # Same rule as validators.validate_normalization_inputs, inlined so the
+    # valid case costs one comparison and `python -O` drops it entirely
+    if __debug__:
+        if not 0.0 < face_width < 1.0:
+            raise ValueError(FACE_WIDTH_ERROR.format(metric_name, face_width))
     return raw_movement / face_width
 
 
@@ -87,7 +134,7 @@ def normalize_posture_alignment(alignment_error: float, face_width: float) -> fl
     return normalize_movement(alignment_error, face_width, "posture_alignment")
 
 
-def get_face_width(landmarks: Any) -> float:
+def get_face_width(landmarks: np.ndarray) -> float:
     """
     Estimate face width using lateral landmarks.
     
@@ -96,7 +143,7 @@ def get_face_width(landmarks: Any) -> float:
     - 234: Left side of face
     
     Args:
-        landmarks: MediaPipe face landmarks
+        landmarks: (N, 3) face landmark coordinates
     
     Returns:
         Face width in normalized coordinates
@@ -105,20 +152,12 @@ def get_face_width(landmarks: Any) -> float:
         IndexError: If landmarks don't contain required indices
     """
     # MediaPipe Face Mesh: 454 (right side), 234 (left side)
-    left_side = landmarks[234]
-    right_side = landmarks[454]
-    
-    # Calculate Euclidean distance
-    width = np.sqrt(
-        (left_side.x - right_side.x)**2 + 
-        (left_side.y - right_side.y)**2 + 
-        (left_side.z - right_side.z)**2
-    )
-    
-    return width
+    # Euclidean distance of two points: math.dist skips ufunc dispatch and
+    # temporary arrays
+    return dist(landmarks[234].tolist(), landmarks[454].tolist())
 
 
-def calculate_landmark_variance(current_landmarks: Any, previous_landmarks: Any, face_width: float) -> float:
+def calculate_landmark_variance(current_landmarks: np.ndarray, previous_landmarks: np.ndarray, face_width: float) -> float:
     """
     Calculate normalized variance between current and previous landmarks.
     
@@ -126,44 +165,21 @@ def calculate_landmark_variance(current_landmarks: Any, previous_landmarks: Any,
     Result is normalized by face width for camera-distance invariance.
     
     Args:
-        current_landmarks: Current frame landmarks
-        previous_landmarks: Previous frame landmarks
+        current_landmarks: Current frame (N, 3) landmark coordinates
+        previous_landmarks: Previous frame (N, 3) landmark coordinates
         face_width: Face width for normalization
     
     Returns:
         Normalized landmark variance (engagement metric)
     """
-    # SPEC 8.2: Use mouth, eyebrow, jaw landmarks for engagement
-    # Mouth landmarks: 61 (right corner), 291 (left corner), 13 (upper lip), 14 (lower lip)
-    # Eyebrow landmarks: 70 (right outer), 300 (left outer), 63 (right inner), 293 (left inner)
-    # Jaw landmark: 152 (chin)
-    key_indices = [
-        61, 291, 13, 14,    # Mouth - 4 points
-        70, 300, 63, 293,   # Eyebrows - 4 points
-        152                  # Jaw - 1 point
-    ]
-    
-    diffs = []
-    for i in key_indices:
-        curr = current_landmarks[i]
-        prev = previous_landmarks[i]
-        
-        # Calculate Euclidean distance
-        d = np.sqrt(
-            (curr.x - prev.x)**2 + 
-            (curr.y - prev.y)**2 + 
-            (curr.z - prev.z)**2
-        )
-        diffs.append(d)
-    
-    # Average movement
-    avg_movement = np.mean(diffs)
+    # Average Euclidean movement of the key points (_ENGAGEMENT_IDX)
+    avg_movement = _variance_kernel(current_landmarks, previous_landmarks, _ENGAGEMENT_IDX)
     
     # Normalize by face width
     return normalize_movement(avg_movement, face_width, "facial_engagement")
 
 
-def calculate_nose_movement(current_nose: Any, previous_nose_pos: tuple, face_width: float) -> float:
+def calculate_nose_movement(current_nose: np.ndarray, previous_nose_pos: Any, face_width: float) -> float:
     """
     Calculate normalized nose movement for stability metric.
     
@@ -171,27 +187,218 @@ def calculate_nose_movement(current_nose: Any, previous_nose_pos: tuple, face_wi
     forward/backward motion which indicates instability in interviews.
     
     Args:
-        current_nose: Current nose landmark
-        previous_nose_pos: Previous nose position (x, y, z) tuple
+        current_nose: Current nose (x, y, z) coordinates
+        previous_nose_pos: Previous nose position (x, y, z) array or tuple
         face_width: Face width for normalization
     
     Returns:
         Normalized nose movement
     """
-    # Use 3D movement to capture forward/backward head instability
+    # A 2D previous position is still accepted for backward compatibility;
+    # hot paths should call calculate_nose_movement_3d directly
     if len(previous_nose_pos) == 2:
-        # Backward compatibility: 2D position
-        raw_movement = np.sqrt(
-            (current_nose.x - previous_nose_pos[0])**2 + 
-            (current_nose.y - previous_nose_pos[1])**2
-        )
-    else:
-        # 3D position (recommended)
-        raw_movement = np.sqrt(
-            (current_nose.x - previous_nose_pos[0])**2 + 
-            (current_nose.y - previous_nose_pos[1])**2 +
-            (current_nose.z - previous_nose_pos[2])**2
-        )
+        return calculate_nose_movement_2d(current_nose, previous_nose_pos, face_width)
+    return calculate_nose_movement_3d(current_nose, previous_nose_pos, face_width)
+
+
+def calculate_nose_movement_3d(current_nose: np.ndarray, previous_nose: np.ndarray, face_width: float) -> float:
+    """
+    Calculate normalized 3D nose movement (X, Y, Z) for stability metric.
     
+    Args:
+        current_nose: Current nose (x, y, z) coordinates
+        previous_nose: Previous nose (x, y, z) coordinates
+        face_width: Face width for normalization
+    
+    Returns:
+        Normalized nose movement
+    """
+    raw_movement = _nose_movement_3d_kernel(current_nose, previous_nose)
     return normalize_movement(raw_movement, face_width, "stability")
 
+
+def calculate_nose_movement_2d(current_nose: np.ndarray, previous_nose: Any, face_width: float) -> float:
+    """
+    Calculate normalized 2D nose movement (X, Y only, legacy behaviour).
+    
+    Args:
+        current_nose: Current nose coordinates (z, if present, is ignored)
+        previous_nose: Previous nose (x, y) coordinates
+        face_width: Face width for normalization
+    
+    Returns:
+        Normalized nose movement
+    """
+    raw_movement = _nose_movement_2d_kernel(current_nose, previous_nose)
+    return normalize_movement(raw_movement, face_width, "stability")
+
+
+def calculate_landmark_variance_batch(landmark_seq: np.ndarray, face_widths: np.ndarray) -> np.ndarray:
+    """
+    Calculate normalized landmark variance for a whole recorded sequence.
+    
+    Vectorized equivalent of calling calculate_landmark_variance for every
+    consecutive frame pair, for offline analysis of recorded interviews.
+    
+    Args:
+        landmark_seq: (T, N, 3) landmark coordinates, one row per frame
+        face_widths: (T,) face width per frame
+    
+    Returns:
+        (T-1,) normalized variance of frame t vs frame t-1, normalized by
+        frame t's face width
+    
+    Raises:
+        ValueError: If any face width used for normalization is invalid
+    """
+    _validate_face_widths(face_widths[1:], "facial_engagement")
+    return _key_point_movement(landmark_seq) / face_widths[1:]
+
+
+def facial_engagement_scores(landmark_seq: np.ndarray, face_widths: np.ndarray) -> np.ndarray:
+    """
+    Calculate per-frame facial expression scores for a recorded sequence.
+    
+    Fuses calculate_landmark_variance_batch with the expression score
+    mapping (normalized variance × ENGAGEMENT_SCORE_SCALE, clamped to 0-100).
+    
+    Args:
+        landmark_seq: (T, N, 3) landmark coordinates, one row per frame
+        face_widths: (T,) face width per frame
+    
+    Returns:
+        (T-1,) expression scores in [0, 100]
+    
+    Raises:
+        ValueError: If any face width used for normalization is invalid
+    """
+    _validate_face_widths(face_widths[1:], "facial_engagement")
+    movement = _key_point_movement(landmark_seq)
+    return np.clip(movement * (ENGAGEMENT_SCORE_SCALE / face_widths[1:]), 0.0, 100.0)
+
+
+def _key_point_movement(landmark_seq: np.ndarray) -> np.ndarray:
+    # (T-1,) mean Euclidean movement of the engagement key points
+    key_points = landmark_seq.take(_ENGAGEMENT_IDX, axis=1)
+    # simsimd rejects empty inputs, so T < 2 takes the NumPy path (-> (0,))
+    if (simsimd is not None and key_points.shape[0] >= 2
+            and key_points.dtype in (np.float32, np.float64)):
+        # Row-wise squared L2 over the flattened (T-1)*9 point pairs
+        n_points = key_points.shape[1]
+        sq = np.asarray(simsimd.sqeuclidean(
+            np.ascontiguousarray(key_points[1:]).reshape(-1, 3),
+            np.ascontiguousarray(key_points[:-1]).reshape(-1, 3)
+        )).reshape(-1, n_points)
+    else:
+        # einsum squares and sums each diff in one pass
+        diff = key_points[1:] - key_points[:-1]
+        sq = np.einsum('tki,tki->tk', diff, diff)
+    return np.sqrt(sq).mean(axis=1)
+
+
+def calculate_nose_movement_batch(landmark_seq: np.ndarray, face_widths: np.ndarray) -> np.ndarray:
+    """
+    Calculate normalized 3D nose movement for a whole recorded sequence.
+    
+    Vectorized equivalent of calling calculate_nose_movement for every
+    consecutive frame pair (nose = landmark 1).
+    
+    Args:
+        landmark_seq: (T, N, 3) landmark coordinates, one row per frame
+        face_widths: (T,) face width per frame
+    
+    Returns:
+        (T-1,) normalized nose movement of frame t vs frame t-1
+    
+    Raises:
+        ValueError: If any face width used for normalization is invalid
+    """
+    _validate_face_widths(face_widths[1:], "stability")
+    nose = landmark_seq[:, 1]
+    return np.linalg.norm(nose[1:] - nose[:-1], axis=1) / face_widths[1:]
+
+
+def _validate_face_widths(face_widths: np.ndarray, metric_name: str) -> None:
+    # Array form of validate_normalization_inputs' face width rule
+    invalid = ~((face_widths > 0.0) & (face_widths < 1.0))
+    if invalid.any():
+        raise ValueError(FACE_WIDTH_ERROR.format(metric_name, face_widths[invalid][0]))
+
+
+def calculate_frame_motion(
+    current_landmarks: np.ndarray,
+    previous_landmarks: np.ndarray,
+    previous_nose_pos: Any,
+    inv_face_width: float
+) -> tuple:
+    """
+    Calculate normalized facial engagement and nose movement in one pass.
+    
+    Equivalent to calculate_landmark_variance and calculate_nose_movement
+    (nose = landmark 1), fused into a single kernel call per frame.
+    
+    Args:
+        current_landmarks: Current frame (N, 3) landmark coordinates
+        previous_landmarks: Previous frame (N, 3) landmark coordinates
+        previous_nose_pos: Previous nose position (x, y, z) array
+        inv_face_width: 1 / face width, from an already validated face width
+    
+    Returns:
+        (normalized landmark variance, normalized nose movement)
+    """
+    variance, nose_movement = _frame_motion_kernel(
+        current_landmarks, previous_landmarks, _ENGAGEMENT_IDX, previous_nose_pos
+    )
+    return variance * inv_face_width, nose_movement * inv_face_width
+
+
+@njit(cache=True, fastmath=True)
+def _frame_motion_kernel(cur, prev, idx, prev_nose):
+    # Mean movement of cur[idx] vs prev[idx], and nose (landmark 1) movement
+    total = 0.0
+    for i in idx:
+        dx = cur[i, 0] - prev[i, 0]
+        dy = cur[i, 1] - prev[i, 1]
+        dz = cur[i, 2] - prev[i, 2]
+        total += sqrt(dx * dx + dy * dy + dz * dz)
+    dx = cur[1, 0] - prev_nose[0]
+    dy = cur[1, 1] - prev_nose[1]
+    dz = cur[1, 2] - prev_nose[2]
+    return total / len(idx), sqrt(dx * dx + dy * dy + dz * dz)
+
+
+@njit(cache=True, fastmath=True)
+def _variance_kernel(cur, prev, idx):
+    # Mean Euclidean distance between cur[idx] and prev[idx]
+    total = 0.0
+    for i in idx:
+        dx = cur[i, 0] - prev[i, 0]
+        dy = cur[i, 1] - prev[i, 1]
+        dz = cur[i, 2] - prev[i, 2]
+        total += sqrt(dx * dx + dy * dy + dz * dz)
+    return total / len(idx)
+
+
+@njit(cache=True, fastmath=True)
+def _nose_movement_3d_kernel(cur, prev):
+    dx = cur[0] - prev[0]
+    dy = cur[1] - prev[1]
+    dz = cur[2] - prev[2]
+    return sqrt(dx * dx + dy * dy + dz * dz)
+
+
+@njit(cache=True, fastmath=True)
+def _nose_movement_2d_kernel(cur, prev):
+    dx = cur[0] - prev[0]
+    dy = cur[1] - prev[1]
+    return sqrt(dx * dx + dy * dy)
+
+
+# Compile (or load from cache) now so the first real frame is not penalized
+_warm = np.zeros((_ENGAGEMENT_IDX.max() + 1, 3), dtype=np.float32)
+_variance_kernel(_warm, _warm, _ENGAGEMENT_IDX)
+_nose_movement_3d_kernel(_warm[1], _warm[0])
+_nose_movement_2d_kernel(_warm[1], _warm[0])
+_frame_motion_kernel(_warm, _warm, _ENGAGEMENT_IDX, _warm[0])
+del _warm
+
@@ -2,10 +2,25 @@
 Validation rules for non-verbal analysis.
 Centralizes all hard rules and thresholds for enforceable validation.
 """
-from typing import Any, Optional
+from typing import Any, Final, Optional
 
+import numpy as np
 
-def is_blink_frame(ear: float, threshold: float = 0.21) -> bool:
+
+# EAR below which a frame counts as a blink (Soukupová & Čech, 2016)
+BLINK_EAR_THRESHOLD: Final = 0.21
+
+# Valid score range
+SCORE_MIN: Final = 0.0
+SCORE_MAX: Final = 100.0
+
+# Error for a face width outside (0, 1); format with (metric_name, face_width)
+FACE_WIDTH_ERROR: Final = (
+    "Invalid face_width for {}: {}. Face width must be positive and < 1.0"
+)
+
+
+def is_blink_frame(ear: float, threshold: float = BLINK_EAR_THRESHOLD) -> bool:
     """
     Determine if a frame represents a blink based on Eye Aspect Ratio.
     
@@ -22,6 +37,22 @@ def is_blink_frame(ear: float, threshold: float = 0.21) -> bool:
     return ear < threshold
 
 
+def is_blink_frame_batch(ears: np.ndarray, threshold: float = BLINK_EAR_THRESHOLD) -> np.ndarray:
+    """
+    Classify a sequence of Eye Aspect Ratios as blink / non-blink frames.
+    
+    Array form of is_blink_frame for offline analysis of recorded frames.
+    
+    Args:
+        ears: (T,) Eye Aspect Ratios
+        threshold: EAR threshold below which a blink is detected
+        
+    Returns:
+        (T,) boolean array, True where the frame is a blink
+    """
+    return np.less(ears, threshold)
+
+
 def is_multi_face_violation(face_count: int, consecutive_count: int, threshold: int) -> bool:
     """
     Check if multi-face detection threshold has been exceeded.
@@ -49,7 +80,13 @@ def is_valid_landmark(landmark: Any) -> bool:
     """
     if landmark is None:
         return False
-    return hasattr(landmark, 'x') and hasattr(landmark, 'y')
+    # EAFP: one try block instead of two hasattr probes
+    try:
+        landmark.x
+        landmark.y
+    except AttributeError:
+        return False
+    return True
 
 
 def is_valid_face_width(face_width: float) -> bool:
@@ -66,7 +103,7 @@ def is_valid_face_width(face_width: float) -> bool:
     return 0.0 < face_width < 1.0
 
 
-def validate_score_range(score: float, min_val: float = 0.0, max_val: float = 100.0) -> float:
+def validate_score_range(score: float, min_val: float = SCORE_MIN, max_val: float = SCORE_MAX) -> float:
     """
     Clamp score to valid range.
     
@@ -78,7 +115,23 @@ def validate_score_range(score: float, min_val: float = 0.0, max_val: float = 10
     Returns:
         Clamped score within [min_val, max_val]
     """
-    return max(min_val, min(max_val, score))
+    # Conditional expression avoids the variadic min()/max() builtin calls
+    return min_val if score < min_val else (max_val if score > max_val else score)
+
+
+def validate_score_range_batch(scores: np.ndarray, min_val: float = SCORE_MIN, max_val: float = SCORE_MAX) -> np.ndarray:
+    """
+    Clamp an array of scores to valid range.
+    
+    Args:
+        scores: Raw score values
+        min_val: Minimum allowed value
+        max_val: Maximum allowed value
+        
+    Returns:
+        Clamped scores within [min_val, max_val]
+    """
+    return np.clip(scores, min_val, max_val)
 
 
 def validate_normalization_inputs(raw_value: float, face_width: float, metric_name: str) -> None:
@@ -94,7 +147,4 @@ def validate_normalization_inputs(raw_value: float, face_width: float, metric_na
         ValueError: If face_width is invalid
     """
     if not is_valid_face_width(face_width):
-        raise ValueError(
-            f"Invalid face_width for {metric_name}: {face_width}. "
-            f"Face width must be positive and < 1.0"
-        )
+        raise ValueError(FACE_WIDTH_ERROR.format(metric_name, face_width))